@@ -4,18 +4,29 @@ This module implements automated content moderation for ad content,
 including text analysis, image moderation, and brand safety checks.
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
 from datetime import datetime
+import hashlib
 import json
 import numpy as np
 from PIL import Image
 import io
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import threading
+from cachetools import TTLCache
 from transformers import pipeline
 
-@dataclass
+from ..utils.compat import DATACLASS_SLOTS
+
+try:
+    import xxhash
+except ImportError:  # xxhash is optional; fall back to blake2b
+    xxhash = None
+
+@dataclass(**DATACLASS_SLOTS)
 class ModerationResult:
     """Result of content moderation"""
     content_id: str
@@ -26,6 +37,47 @@ class ModerationResult:
     details: Dict[str, any]
     timestamp: datetime
 
+def _cache_key(data: bytes) -> bytes:
+    """128-bit digest of raw content bytes used as the analysis cache key
+    
+    Uses XXH3 when available, which hashes several times faster than
+    blake2b; both are stable across processes.
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+# Leading signature bytes of the image formats the models accept
+_IMAGE_MAGICS = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF8', 'gif'),
+    (b'BM', 'bmp')
+)
+
+def _sniff_image_format(data: bytes) -> str:
+    """Identify image format from magic bytes without decoding
+    
+    Args:
+        data: Raw image bytes
+        
+    Returns:
+        Image format name
+        
+    Raises:
+        ValueError: If data is not bytes or not a recognized image
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise ValueError(f"Expected image bytes, got {type(data).__name__}")
+    
+    header = bytes(data[:12])
+    for magic, image_format in _IMAGE_MAGICS:
+        if header.startswith(magic):
+            return image_format
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    raise ValueError("Unrecognized image format")
+
 class ContentModerator:
     """Moderates ad content for policy compliance and brand safety"""
     
@@ -38,10 +90,36 @@ class ContentModerator:
                 - model_path: Path to local models
                 - confidence_threshold: Minimum confidence for approval
                 - cache_size: Size of results cache
+                - cache_ttl: Lifetime of cached results in seconds
+                - moderation_workers: Threads for image analysis and
+                  landing page checks
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.cache: Dict[str, ModerationResult] = {}
+        
+        # Model analyses keyed by content digest, bounded and expiring
+        self.cache: TTLCache = TTLCache(
+            maxsize=config.get('cache_size', 100_000),
+            ttl=config.get('cache_ttl', 3600)
+        )
+        self._cache_lock = threading.Lock()
+        self._batch_size = config.get('model_batch_size', 32)
+        
+        # Keep-alive connections to landing page hosts, shared across batches
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=config.get('landing_page_pools', 10),
+            pool_maxsize=32
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._session.headers['Accept-Encoding'] = 'gzip, br'
+        
+        # Shared across batches; one thread for image analysis plus one per
+        # pooled landing page connection
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.get('moderation_workers', 33)
+        )
         
         # Initialize models
         self._init_models()
@@ -63,16 +141,148 @@ class ContentModerator:
             Moderation result
         """
         try:
-            # Check cache
-            cache_key = f"text:{content_id}"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
+            return self._moderate_texts([(text, content_id, context)])[0]
+            
+        except Exception as e:
+            self.logger.error(f"Text moderation failed: {str(e)}")
+            raise
+    
+    def moderate_image(
+        self,
+        image: bytes,
+        content_id: str,
+        context: Optional[Dict[str, any]] = None
+    ) -> ModerationResult:
+        """Moderate image content
+        
+        Args:
+            image: Image bytes to moderate
+            content_id: Content identifier
+            context: Optional context information
+            
+        Returns:
+            Moderation result
+        """
+        try:
+            return self._moderate_images([(image, content_id, context)])[0]
+            
+        except Exception as e:
+            self.logger.error(f"Image moderation failed: {str(e)}")
+            raise
+    
+    def moderate_ad(
+        self,
+        ad: Dict[str, any]
+    ) -> Dict[str, ModerationResult]:
+        """Moderate complete ad content
+        
+        Args:
+            ad: Ad content dictionary
+            
+        Returns:
+            Dictionary mapping content types to moderation results
+        """
+        try:
+            return self.moderate_batch([ad])[0]
+            
+        except Exception as e:
+            self.logger.error(f"Ad moderation failed: {str(e)}")
+            raise
+    
+    def moderate_batch(
+        self,
+        ads: List[Dict[str, any]]
+    ) -> List[Dict[str, ModerationResult]]:
+        """Moderate many ads with one model call per model
+        
+        Texts and images of all ads are analyzed in single batched model
+        calls running side by side, while landing pages are fetched
+        concurrently in the same thread pool. Text extracted from images
+        goes through the text models afterwards, on this thread, since
+        the text pipelines are not thread-safe.
+        
+        Args:
+            ads: Ad content dictionaries
+            
+        Returns:
+            List of dictionaries mapping content types to moderation
+            results, aligned with ads
+        """
+        try:
+            text_items, text_slots = [], []
+            image_items, image_slots = [], []
+            
+            for ad_idx, ad in enumerate(ads):
+                for field in ['title', 'description', 'cta']:
+                    if field in ad:
+                        text_items.append((ad[field], f"{ad['id']}_{field}", {'field': field}))
+                        text_slots.append((ad_idx, field))
+                
+                for idx, image in enumerate(ad.get('images', [])):
+                    image_items.append((
+                        image['data'],
+                        f"{ad['id']}_image_{idx}",
+                        {'image_type': image.get('type')}
+                    ))
+                    image_slots.append((ad_idx, f"image_{idx}"))
+            
+            results: List[Dict[str, ModerationResult]] = [{} for _ in ads]
+            landing_ads = [ad_idx for ad_idx, ad in enumerate(ads) if ad.get('landing_page')]
+            
+            # Image models and landing page requests overlap with text inference
+            image_future = self._executor.submit(self._analyze_image_items, image_items)
+            landing_futures = {
+                ad_idx: self._executor.submit(
+                    self._check_landing_page,
+                    ads[ad_idx]['landing_page'],
+                    f"{ads[ad_idx]['id']}_landing_page"
+                )
+                for ad_idx in landing_ads
+            }
+            
+            for (ad_idx, key), result in zip(text_slots, self._moderate_texts(text_items)):
+                results[ad_idx][key] = result
             
-            # Analyze text
-            toxicity = self._analyze_toxicity(text)
-            sentiment = self._analyze_sentiment(text)
-            categories = self._classify_content(text)
+            image_analyses = image_future.result()
+            image_results = self._build_image_results(
+                image_items,
+                image_analyses,
+                self._moderate_texts(self._image_text_items(image_items, image_analyses))
+            )
+            for (ad_idx, key), result in zip(image_slots, image_results):
+                results[ad_idx][key] = result
             
+            for ad_idx, future in landing_futures.items():
+                results[ad_idx]['landing_page'] = future.result()
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Batch moderation failed: {str(e)}")
+            raise
+    
+    def close(self) -> None:
+        """Stop the worker threads and close pooled landing page connections"""
+        self._executor.shutdown(wait=True)
+        self._session.close()
+    
+    def _moderate_texts(
+        self,
+        items: List[Tuple[str, str, Optional[Dict[str, any]]]]
+    ) -> List[ModerationResult]:
+        """Moderate texts with one call per model for all uncached texts
+        
+        Args:
+            items: (text, content_id, context) tuples
+            
+        Returns:
+            Moderation results aligned with items
+        """
+        keys = [_cache_key(text.encode()) for text, _, _ in items]
+        analyses = self._cached_analyses(keys, [text for text, _, _ in items], self._analyze_texts)
+        results = []
+        
+        for (_, content_id, context), (toxicity, sentiment, categories) in zip(items, analyses):
             # Check against thresholds
             is_approved = all([
                 toxicity['score'] < self.config['toxicity_threshold'],
@@ -82,7 +292,7 @@ class ContentModerator:
             ])
             
             # Create result
-            result = ModerationResult(
+            results.append(ModerationResult(
                 content_id=content_id,
                 content_type='text',
                 is_approved=is_approved,
@@ -97,66 +307,90 @@ class ContentModerator:
                     'context': context
                 },
                 timestamp=datetime.now()
-            )
-            
-            # Cache result
-            self.cache[cache_key] = result
+            ))
+        
+        return results
+    
+    def _moderate_images(
+        self,
+        items: List[Tuple[bytes, str, Optional[Dict[str, any]]]]
+    ) -> List[ModerationResult]:
+        """Moderate images with one call per model for all uncached images
+        
+        Args:
+            items: (image bytes, content_id, context) tuples
             
-            return result
+        Returns:
+            Moderation results aligned with items
+        """
+        analyses = self._analyze_image_items(items)
+        
+        # Check extracted text in one batch
+        text_results = self._moderate_texts(self._image_text_items(items, analyses))
+        return self._build_image_results(items, analyses, text_results)
+    
+    def _analyze_image_items(
+        self,
+        items: List[Tuple[bytes, str, Optional[Dict[str, any]]]]
+    ) -> List[Tuple]:
+        """Run the image models on items, using cached analyses where possible
+        
+        Args:
+            items: (image bytes, content_id, context) tuples
             
-        except Exception as e:
-            self.logger.error(f"Text moderation failed: {str(e)}")
-            raise
+        Returns:
+            (nsfw_score, objects, text) analyses aligned with items
+        """
+        # Reject non-images before hashing or decoding anything
+        for image, _, _ in items:
+            _sniff_image_format(image)
+        
+        keys = [_cache_key(image) for image, _, _ in items]
+        return self._cached_analyses(keys, [image for image, _, _ in items], self._analyze_images)
     
-    def moderate_image(
+    def _image_text_items(
         self,
-        image: bytes,
-        content_id: str,
-        context: Optional[Dict[str, any]] = None
-    ) -> ModerationResult:
-        """Moderate image content
+        items: List[Tuple[bytes, str, Optional[Dict[str, any]]]],
+        analyses: List[Tuple]
+    ) -> List[Tuple[str, str, Optional[Dict[str, any]]]]:
+        """Get text moderation items for the text extracted from images"""
+        return [
+            (text, f"{content_id}_text", context)
+            for (_, content_id, context), (_, _, text) in zip(items, analyses) if text
+        ]
+    
+    def _build_image_results(
+        self,
+        items: List[Tuple[bytes, str, Optional[Dict[str, any]]]],
+        analyses: List[Tuple],
+        text_results: List[ModerationResult]
+    ) -> List[ModerationResult]:
+        """Combine image analyses and extracted text results into moderation results
         
         Args:
-            image: Image bytes to moderate
-            content_id: Content identifier
-            context: Optional context information
+            items: (image bytes, content_id, context) tuples
+            analyses: Image analyses aligned with items
+            text_results: Results for _image_text_items(items, analyses)
             
         Returns:
-            Moderation result
+            Moderation results aligned with items
         """
-        try:
-            # Check cache
-            cache_key = f"image:{content_id}"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-            
-            # Convert bytes to PIL Image
-            img = Image.open(io.BytesIO(image))
-            
-            # Analyze image
-            nsfw_score = self._check_nsfw(img)
-            objects = self._detect_objects(img)
-            text = self._extract_text(img)
-            
-            # Check text if found
-            text_results = None
-            if text:
-                text_results = self.moderate_text(
-                    text,
-                    f"{content_id}_text",
-                    context
-                )
+        text_results = iter(text_results)
+        results = []
+        
+        for (_, content_id, context), (nsfw_score, objects, text) in zip(items, analyses):
+            text_result = next(text_results) if text else None
             
             # Check against thresholds
             is_approved = all([
                 nsfw_score < self.config['nsfw_threshold'],
                 not any(obj in self.config['forbidden_objects']
                        for obj in objects),
-                text_results.is_approved if text_results else True
+                text_result.is_approved if text_result else True
             ])
             
             # Create result
-            result = ModerationResult(
+            results.append(ModerationResult(
                 content_id=content_id,
                 content_type='image',
                 is_approved=is_approved,
@@ -165,58 +399,106 @@ class ContentModerator:
                 details={
                     'nsfw_score': nsfw_score,
                     'objects': objects,
-                    'text_results': text_results.details if text_results else None,
+                    'text_results': text_result.details if text_result else None,
                     'context': context
                 },
                 timestamp=datetime.now()
-            )
-            
-            # Cache result
-            self.cache[cache_key] = result
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"Image moderation failed: {str(e)}")
-            raise
+            ))
+        
+        return results
     
-    def moderate_ad(
+    def _cached_analyses(
         self,
-        ad: Dict[str, any]
-    ) -> Dict[str, ModerationResult]:
-        """Moderate complete ad content
+        keys: List[bytes],
+        contents: List[any],
+        analyze: Callable[[List[any]], List[Tuple]]
+    ) -> List[Tuple]:
+        """Look up model analyses by content digest, analyzing misses in one batch
         
         Args:
-            ad: Ad content dictionary
+            keys: Content digests aligned with contents
+            contents: Texts or image bytes
+            analyze: Batch analysis function for the uncached contents
             
         Returns:
-            Dictionary mapping content types to moderation results
+            Analysis tuples aligned with contents
         """
-        try:
-            results = {}
-            
-            # Moderate text components
-            for field in ['title', 'description', 'cta']:
-                if field in ad:
-                    results[field] = self.moderate_text(
-                        ad[field],
-                        f"{ad['id']}_{field}",
-                        {'field': field}
-                    )
-            
-            # Moderate images
-            for idx, image in enumerate(ad.get('images', [])):
-                results[f"image_{idx}"] = self.moderate_image(
-                    image['data'],
-                    f"{ad['id']}_image_{idx}",
-                    {'image_type': image.get('type')}
-                )
-            
-            return results
+        found = {}
+        pending = {}
+        with self._cache_lock:
+            for key, content in zip(keys, contents):
+                if key in found or key in pending:
+                    continue
+                analysis = self.cache.get(key)
+                if analysis is None:
+                    pending[key] = content
+                else:
+                    found[key] = analysis
+        
+        if pending:
+            analyses = analyze(list(pending.values()))
+            with self._cache_lock:
+                for key, analysis in zip(pending, analyses):
+                    self.cache[key] = analysis
+                    found[key] = analysis
+        
+        return [found[key] for key in keys]
+    
+    def _analyze_texts(self, texts: List[str]) -> List[Tuple]:
+        """Run all text models, returning (toxicity, sentiment, categories) per text"""
+        return list(zip(
+            self._analyze_toxicity(texts),
+            self._analyze_sentiment(texts),
+            self._classify_content(texts)
+        ))
+    
+    def _analyze_images(self, images: List[bytes]) -> List[Tuple]:
+        """Run all image models, returning (nsfw_score, objects, text) per image"""
+        # Convert bytes to PIL Images
+        decoded = [Image.open(io.BytesIO(image)) for image in images]
+        return list(zip(
+            self._check_nsfw(decoded),
+            self._detect_objects(decoded),
+            self._extract_text(decoded)
+        ))
+    
+    def _check_landing_page(self, url: str, content_id: str) -> ModerationResult:
+        """Check that an ad landing page is reachable
+        
+        Args:
+            url: Landing page URL
+            content_id: Content identifier
             
-        except Exception as e:
-            self.logger.error(f"Ad moderation failed: {str(e)}")
-            raise
+        Returns:
+            Moderation result
+        """
+        try:
+            response = self._session.get(
+                url,
+                timeout=self.config.get('landing_page_timeout', 10),
+                allow_redirects=True
+            )
+            status_code = response.status_code
+            error = None
+        except requests.RequestException as e:
+            status_code = None
+            error = str(e)
+        
+        is_approved = status_code is not None and status_code < 400
+        
+        return ModerationResult(
+            content_id=content_id,
+            content_type='landing_page',
+            is_approved=is_approved,
+            confidence=1.0 if status_code is not None else 0.0,
+            categories=[],
+            details={
+                'url': url,
+                'status_code': status_code,
+                'error': error
+            },
+            timestamp=datetime.now()
+        )
     
     def _init_models(self) -> None:
         """Initialize ML models"""
@@ -259,87 +541,101 @@ class ContentModerator:
             self.logger.error(f"Model initialization failed: {str(e)}")
             raise
     
-    def _analyze_toxicity(self, text: str) -> Dict[str, any]:
+    def _analyze_toxicity(self, texts: List[str]) -> List[Dict[str, any]]:
         """Analyze text toxicity
         
         Args:
-            text: Text to analyze
+            texts: Texts to analyze
             
         Returns:
-            Toxicity analysis results
+            Toxicity analysis results, one per text
         """
-        result = self.toxicity_model(text)[0]
-        return {
-            'score': result['score'],
-            'confidence': result['score'] if result['label'] == 'toxic' else 1 - result['score']
-        }
+        return [
+            {
+                'score': result['score'],
+                'confidence': result['score'] if result['label'] == 'toxic' else 1 - result['score']
+            }
+            for result in self.toxicity_model(texts, batch_size=self._batch_size)
+        ]
     
-    def _analyze_sentiment(self, text: str) -> Dict[str, any]:
+    def _analyze_sentiment(self, texts: List[str]) -> List[Dict[str, any]]:
         """Analyze text sentiment
         
         Args:
-            text: Text to analyze
+            texts: Texts to analyze
             
         Returns:
-            Sentiment analysis results
+            Sentiment analysis results, one per text
         """
-        result = self.sentiment_model(text)[0]
-        return {
-            'score': result['score'] if result['label'] == 'POSITIVE' else -result['score'],
-            'confidence': result['score']
-        }
+        return [
+            {
+                'score': result['score'] if result['label'] == 'POSITIVE' else -result['score'],
+                'confidence': result['score']
+            }
+            for result in self.sentiment_model(texts, batch_size=self._batch_size)
+        ]
     
-    def _classify_content(self, text: str) -> List[str]:
+    def _classify_content(self, texts: List[str]) -> List[List[str]]:
         """Classify content categories
         
         Args:
-            text: Text to classify
+            texts: Texts to classify
             
         Returns:
-            List of content categories
+            List of content categories per text
         """
-        result = self.classification_model(
-            text,
-            candidate_labels=self.config['content_categories']
+        results = self.classification_model(
+            texts,
+            candidate_labels=self.config['content_categories'],
+            batch_size=self._batch_size
         )
+        if isinstance(results, dict):
+            results = [results]
         
         # Return categories above threshold
         return [
-            label for label, score in zip(result['labels'], result['scores'])
-            if score > self.config['category_threshold']
+            [
+                label for label, score in zip(result['labels'], result['scores'])
+                if score > self.config['category_threshold']
+            ]
+            for result in results
         ]
     
-    def _check_nsfw(self, image: Image) -> float:
-        """Check image for NSFW content
+    def _check_nsfw(self, images: List[Image.Image]) -> List[float]:
+        """Check images for NSFW content
         
         Args:
-            image: PIL Image to check
+            images: PIL Images to check
             
         Returns:
-            NSFW probability score
+            NSFW probability score per image
         """
-        result = self.nsfw_model(image)[0]
-        return result['score'] if result['label'] == 'NSFW' else 0.0
+        return [
+            predictions[0]['score'] if predictions[0]['label'] == 'NSFW' else 0.0
+            for predictions in self.nsfw_model(images, batch_size=self._batch_size)
+        ]
     
-    def _detect_objects(self, image: Image) -> List[Dict[str, any]]:
-        """Detect objects in image
+    def _detect_objects(self, images: List[Image.Image]) -> List[List[Dict[str, any]]]:
+        """Detect objects in images
         
         Args:
-            image: PIL Image to analyze
+            images: PIL Images to analyze
             
         Returns:
-            List of detected objects
+            List of detected objects per image
         """
-        return self.object_detection_model(image)
+        return self.object_detection_model(images, batch_size=self._batch_size)
     
-    def _extract_text(self, image: Image) -> Optional[str]:
-        """Extract text from image
+    def _extract_text(self, images: List[Image.Image]) -> List[Optional[str]]:
+        """Extract text from images
         
         Args:
-            image: PIL Image to process
+            images: PIL Images to process
             
         Returns:
-            Extracted text if any
+            Extracted text per image, None where no text was found
         """
-        result = self.ocr_model(image)
-        return result[0]['generated_text'] if result else None
\ No newline at end of file
+        return [
+            result[0]['generated_text'] if result else None
+            for result in self.ocr_model(images, batch_size=self._batch_size)
+        ]
@@ -4,9 +4,9 @@ This module implements automated monitoring of regulatory compliance
 for ad campaigns across different regions and industries.
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import requests
@@ -16,7 +16,51 @@ import schedule
 import time
 import threading
 
-@dataclass
+from ..utils.compat import DATACLASS_SLOTS
+from ..utils.hashing import content_key as _content_key
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the json module
+    orjson = None
+
+def _json_loads(data: bytes) -> any:
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _parse_requirement(requirement: str) -> Tuple[str, Optional[str], Optional[str], any]:
+    """Parse a "field:condition" requirement
+    
+    Returns:
+        (requirement, field, operator, argument) tuple; operator is None for
+        malformed requirements, which never pass
+    """
+    try:
+        req_parts = requirement.split(':')
+        if len(req_parts) != 2:
+            return requirement, None, None, None
+        
+        field_name, condition = req_parts
+        
+        if condition.startswith('min_length='):
+            return requirement, field_name, 'min_length', int(condition.split('=')[1])
+        elif condition.startswith('max_length='):
+            return requirement, field_name, 'max_length', int(condition.split('=')[1])
+        elif condition.startswith('contains='):
+            return requirement, field_name, 'contains', condition.split('=')[1]
+        elif condition.startswith('not_contains='):
+            return requirement, field_name, 'not_contains', condition.split('=')[1]
+        elif condition == 'required':
+            return requirement, field_name, 'required', None
+        
+        return requirement, field_name, None, None
+        
+    except Exception:
+        return requirement, None, None, None
+
+@dataclass(**DATACLASS_SLOTS)
 class Regulation:
     """Represents a regulatory requirement"""
     id: str
@@ -27,8 +71,41 @@ class Regulation:
     effective_date: datetime
     expiry_date: Optional[datetime] = None
     is_active: bool = True
+    _parsed_requirements: Tuple[Tuple[str, Optional[str], Optional[str], any], ...] = field(
+        init=False,
+        repr=False,
+        compare=False,
+        default=()
+    )
+    _req_sets: Dict[str, FrozenSet[str]] = field(
+        init=False,
+        repr=False,
+        compare=False,
+        default_factory=dict
+    )
+    
+    def __post_init__(self):
+        self.compile_requirements()
+    
+    def compile_requirements(self) -> None:
+        """Pre-parse requirements into lookup tables used by the checks
+        
+        "field:condition" strings are parsed into tuples once, and the
+        category -> elements mapping form is converted into frozensets.
+        """
+        if isinstance(self.requirements, dict):
+            self._parsed_requirements = ()
+            self._req_sets = {
+                category: frozenset(elements)
+                for category, elements in self.requirements.items()
+            }
+        else:
+            self._parsed_requirements = tuple(
+                _parse_requirement(req) for req in (self.requirements or ())
+            )
+            self._req_sets = {}
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ComplianceCheck:
     """Result of a compliance check"""
     regulation_id: str
@@ -38,6 +115,7 @@ class ComplianceCheck:
     details: Dict[str, any]
     timestamp: datetime
 
+
 class RegulatoryMonitor:
     """Monitors regulatory compliance for ad campaigns"""
     
@@ -54,7 +132,17 @@ class RegulatoryMonitor:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.regulations: Dict[str, Regulation] = {}
-        self.cache: Dict[str, ComplianceCheck] = {}
+        self.cache: Dict[Tuple[bytes, str], ComplianceCheck] = {}
+        
+        # Region segments (e.g. ('US', 'CA')) -> regulation IDs, rebuilt by
+        # every mutator under the lock since the scheduler thread updates too
+        self._regulations_lock = threading.RLock()
+        self._region_index: Dict[Tuple[str, ...], Set[str]] = {}
+        self._indexed_regulations: Optional[Dict[str, Regulation]] = None
+        
+        # Validators of the last applied regulations feed response
+        self._feed_etag: Optional[str] = None
+        self._feed_last_modified: Optional[str] = None
         self.update_thread = None
         self.running = False
         
@@ -85,19 +173,26 @@ class RegulatoryMonitor:
             
             # Get applicable regulations
             regulations = self._get_applicable_regulations(region, industry)
+            if not regulations:
+                return results
+            
+            # One digest per content, shared by all regulation cache keys
+            content_key = _content_key(content)
             
             for regulation in regulations:
                 # Check cache
-                cache_key = f"{content['id']}:{regulation.id}"
+                cache_key = (content_key, regulation.id)
                 if cache_key in self.cache:
                     results.append(self.cache[cache_key])
                     continue
                 
                 # Check requirements
-                missing = []
-                for req in regulation.requirements:
-                    if not self._check_requirement(req, content):
-                        missing.append(req)
+                missing = [
+                    parsed[0] for parsed in regulation._parsed_requirements
+                    if not self._check_parsed_requirement(parsed, content)
+                ]
+                if regulation._req_sets and not self._validate_requirements(regulation, content):
+                    missing.extend(self._missing_required_elements(regulation._req_sets, content))
                 
                 # Create result
                 result = ComplianceCheck(
@@ -180,10 +275,12 @@ class RegulatoryMonitor:
                 raise ValueError("Invalid regulation format")
             
             # Add to regulations
-            self.regulations[regulation.id] = regulation
-            
-            # Clear cache since regulations changed
-            self.cache.clear()
+            with self._regulations_lock:
+                self.regulations[regulation.id] = regulation
+                self._rebuild_region_index()
+                
+                # Clear cache since regulations changed
+                self.cache.clear()
             
             self.logger.info(f"Added regulation {regulation.id}")
             
@@ -203,26 +300,32 @@ class RegulatoryMonitor:
             updates: Dictionary of updates to apply
         """
         try:
-            if regulation_id not in self.regulations:
-                raise KeyError(f"Regulation {regulation_id} not found")
-            
-            # Get current regulation
-            regulation = self.regulations[regulation_id]
-            
-            # Apply updates
-            for key, value in updates.items():
-                if hasattr(regulation, key):
-                    setattr(regulation, key, value)
-            
-            # Validate updated regulation
-            if not self._validate_regulation(regulation):
-                raise ValueError("Invalid regulation after update")
-            
-            # Update regulation
-            self.regulations[regulation_id] = regulation
-            
-            # Clear cache
-            self.cache.clear()
+            with self._regulations_lock:
+                if regulation_id not in self.regulations:
+                    raise KeyError(f"Regulation {regulation_id} not found")
+                
+                # Get current regulation
+                regulation = self.regulations[regulation_id]
+                
+                # Apply updates
+                for key, value in updates.items():
+                    if hasattr(regulation, key):
+                        setattr(regulation, key, value)
+                
+                # Re-parse requirements
+                if 'requirements' in updates:
+                    regulation.compile_requirements()
+                
+                # Validate updated regulation
+                if not self._validate_regulation(regulation):
+                    raise ValueError("Invalid regulation after update")
+                
+                # Update regulation
+                self.regulations[regulation_id] = regulation
+                self._rebuild_region_index()
+                
+                # Clear cache
+                self.cache.clear()
             
             self.logger.info(f"Updated regulation {regulation_id}")
             
@@ -244,6 +347,9 @@ class RegulatoryMonitor:
                         if self._validate_regulation(regulation):
                             self.regulations[regulation.id] = regulation
             
+            with self._regulations_lock:
+                self._rebuild_region_index()
+            
             self.logger.info(f"Loaded {len(self.regulations)} regulations")
             
         except Exception as e:
@@ -268,26 +374,54 @@ class RegulatoryMonitor:
     def _update_regulations(self) -> None:
         """Update regulations from external source"""
         try:
-            # Call regulatory API
-            response = requests.get(
-                self.config['api_url'],
-                headers={'Authorization': f"Bearer {self.config['api_key']}"}
-            )
+            # Call regulatory API, conditional on the last fetched version
+            headers = {'Authorization': f"Bearer {self.config['api_key']}"}
+            if self._feed_etag:
+                headers['If-None-Match'] = self._feed_etag
+            if self._feed_last_modified:
+                headers['If-Modified-Since'] = self._feed_last_modified
+            
+            response = requests.get(self.config['api_url'], headers=headers)
+            if response.status_code == 304:
+                self.logger.info("Regulations unchanged since last update")
+                return
             response.raise_for_status()
             
             # Process updates
-            updates = response.json()
-            for update in updates:
-                regulation = Regulation(**update)
-                if self._validate_regulation(regulation):
-                    self.regulations[regulation.id] = regulation
-            
+            updates = _json_loads(response.content)
+            regulations = [
+                Regulation(**self._parse_regulation_dates(update))
+                for update in updates
+            ]
+            with self._regulations_lock:
+                for regulation in regulations:
+                    if self._validate_regulation(regulation):
+                        self.regulations[regulation.id] = regulation
+                self._rebuild_region_index()
+            
+            # Remember feed version only once its updates are applied
+            self._feed_etag = response.headers.get('ETag')
+            self._feed_last_modified = response.headers.get('Last-Modified')
             self.logger.info("Regulations updated successfully")
             
         except Exception as e:
             self.logger.error(f"Regulations update failed: {str(e)}")
             raise
     
+    def _parse_regulation_dates(self, data: Dict[str, any]) -> Dict[str, any]:
+        """Convert ISO-8601 date strings in regulation data to datetimes
+        
+        Args:
+            data: Raw regulation data
+            
+        Returns:
+            Regulation data with parsed dates
+        """
+        for key in ('effective_date', 'expiry_date'):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key])
+        return data
+    
     def _validate_regulation(self, regulation: Regulation) -> bool:
         """Validate regulation
         
@@ -330,16 +464,97 @@ class RegulatoryMonitor:
         Returns:
             List of applicable regulations
         """
+        parts = tuple(region.split('-'))
+        
+        with self._regulations_lock:
+            # Regulations may also be replaced wholesale
+            if self._indexed_regulations is not self.regulations:
+                self._rebuild_region_index()
+            
+            # A region matches regulations of itself, its parent regions and Global
+            regulation_ids = set(self._region_index.get(('Global',), ()))
+            for i in range(1, len(parts) + 1):
+                regulation_ids.update(self._region_index.get(parts[:i], ()))
+            candidates = [self.regulations[reg_id] for reg_id in regulation_ids]
+        
         now = datetime.now()
         return [
-            reg for reg in self.regulations.values()
+            reg for reg in candidates
             if reg.is_active and
-            reg.region == region and
             reg.industry == industry and
             reg.effective_date <= now and
             (not reg.expiry_date or reg.expiry_date > now)
         ]
     
+    def _rebuild_region_index(self) -> None:
+        """Index regulation IDs by their region segments
+        
+        Must be called with _regulations_lock held.
+        """
+        index: Dict[Tuple[str, ...], Set[str]] = {}
+        for regulation in self.regulations.values():
+            index.setdefault(tuple(regulation.region.split('-')), set()).add(regulation.id)
+        self._region_index = index
+        self._indexed_regulations = self.regulations
+    
+    def _validate_requirements(
+        self,
+        requirements: Union[Regulation, Dict[str, List[str]]],
+        provided: Dict[str, Dict[str, any]]
+    ) -> bool:
+        """Check that every required element of each category is provided
+        
+        Args:
+            requirements: Regulation, or category -> required elements mapping
+            provided: Category -> element values supplied by the content
+            
+        Returns:
+            bool: True if all required elements are present and truthy
+        """
+        if isinstance(requirements, Regulation):
+            req_sets = requirements._req_sets
+        else:
+            req_sets = {
+                category: frozenset(elements)
+                for category, elements in requirements.items()
+            }
+        
+        for category, required in req_sets.items():
+            if not required <= self._provided_elements(provided, category):
+                return False
+        return True
+    
+    def _missing_required_elements(
+        self,
+        req_sets: Dict[str, FrozenSet[str]],
+        provided: Dict[str, Dict[str, any]]
+    ) -> List[str]:
+        """List required elements that are absent or falsy
+        
+        Args:
+            req_sets: Category -> required elements
+            provided: Category -> element values supplied by the content
+            
+        Returns:
+            Sorted "category.element" names of missing elements
+        """
+        missing = []
+        for category, required in req_sets.items():
+            absent = required - self._provided_elements(provided, category)
+            missing.extend(f"{category}.{element}" for element in sorted(absent))
+        return missing
+    
+    def _provided_elements(
+        self,
+        provided: Dict[str, Dict[str, any]],
+        category: str
+    ) -> Set[str]:
+        """Get the elements of a category that content provides truthily"""
+        values = provided.get(category)
+        if not isinstance(values, dict):
+            return set()
+        return {key for key, value in values.items() if value}
+    
     def _check_requirement(
         self,
         requirement: str,
@@ -351,43 +566,52 @@ class RegulatoryMonitor:
             requirement: Requirement to check
             content: Content to check
             
+        Returns:
+            bool: True if requirement is met
+        """
+        return self._check_parsed_requirement(_parse_requirement(requirement), content)
+    
+    def _check_parsed_requirement(
+        self,
+        parsed: Tuple[str, Optional[str], Optional[str], any],
+        content: Dict[str, any]
+    ) -> bool:
+        """Check content against a requirement pre-parsed by _parse_requirement
+        
+        Args:
+            parsed: (requirement, field, operator, argument) tuple
+            content: Content to check
+            
         Returns:
             bool: True if requirement is met
         """
         try:
-            # Parse requirement
-            req_parts = requirement.split(':')
-            if len(req_parts) != 2:
+            _, field_name, operator, argument = parsed
+            if operator is None:
                 return False
             
-            field, condition = req_parts
-            
             # Get field value
-            value = content.get(field)
+            value = content.get(field_name)
             if value is None:
                 return False
             
             # Check condition
-            if condition.startswith('min_length='):
-                min_len = int(condition.split('=')[1])
-                return len(str(value)) >= min_len
+            if operator == 'min_length':
+                return len(str(value)) >= argument
             
-            elif condition.startswith('max_length='):
-                max_len = int(condition.split('=')[1])
-                return len(str(value)) <= max_len
+            elif operator == 'max_length':
+                return len(str(value)) <= argument
             
-            elif condition.startswith('contains='):
-                required = condition.split('=')[1]
-                return required in str(value)
+            elif operator == 'contains':
+                return argument in str(value)
             
-            elif condition.startswith('not_contains='):
-                forbidden = condition.split('=')[1]
-                return forbidden not in str(value)
+            elif operator == 'not_contains':
+                return argument not in str(value)
             
-            elif condition == 'required':
+            elif operator == 'required':
                 return bool(value)
             
             return False
             
         except Exception:
-            return False
\ No newline at end of file
+            return False
@@ -4,14 +4,17 @@ This module implements automated policy checking for ad content
 and campaigns across different advertising platforms.
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Dict, FrozenSet, List, Optional, Pattern, Set, Tuple
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import re
 
-@dataclass
+from ..utils.compat import DATACLASS_SLOTS
+from ..utils.hashing import content_key as _content_key
+
+@dataclass(**DATACLASS_SLOTS)
 class PolicyRule:
     """Represents a policy rule"""
     id: str
@@ -24,8 +27,57 @@ class PolicyRule:
     max_length: Optional[int] = None
     min_length: Optional[int] = None
     is_active: bool = True
+    min_width: Optional[int] = None
+    min_height: Optional[int] = None
+    max_size_kb: Optional[float] = None
+    allowed_formats: Optional[Set[str]] = None
+    _compiled_regex: Tuple[Pattern, ...] = field(
+        init=False,
+        repr=False,
+        compare=False,
+        default=()
+    )
+    _image_limits: Optional[Tuple[int, int, float, FrozenSet[str]]] = field(
+        init=False,
+        repr=False,
+        compare=False,
+        default=None
+    )
+    
+    def __post_init__(self):
+        self.compile_patterns()
+        self.compile_image_limits()
+    
+    def compile_patterns(self) -> None:
+        """Compile regex_patterns once so checks reuse the compiled forms
+        
+        Raises:
+            ValueError: If any pattern is not a valid regular expression
+        """
+        try:
+            self._compiled_regex = tuple(
+                re.compile(pattern) for pattern in (self.regex_patterns or ())
+            )
+        except re.error as e:
+            raise ValueError(f"Invalid regex pattern in rule {self.id}: {str(e)}")
+    
+    def compile_image_limits(self) -> None:
+        """Pack image constraints into a (min_width, min_height, max_size_kb,
+        allowed_formats) tuple, or None if the rule sets none of them"""
+        if all(limit is None for limit in (
+            self.min_width, self.min_height, self.max_size_kb, self.allowed_formats
+        )):
+            self._image_limits = None
+            return
+        
+        self._image_limits = (
+            self.min_width or 0,
+            self.min_height or 0,
+            self.max_size_kb if self.max_size_kb is not None else float('inf'),
+            frozenset(fmt.lower() for fmt in self.allowed_formats or ())
+        )
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class PolicyViolation:
     """Represents a policy violation"""
     rule_id: str
@@ -35,6 +87,7 @@ class PolicyViolation:
     context: str
     timestamp: datetime
 
+
 class PolicyChecker:
     """Checks ad content and campaigns for policy compliance"""
     
@@ -50,7 +103,11 @@ class PolicyChecker:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.rules: Dict[str, PolicyRule] = {}
-        self.violation_cache: Dict[str, List[PolicyViolation]] = {}
+        self.violation_cache: Dict[bytes, List[PolicyViolation]] = {}
+        
+        # Forbidden word -> IDs of rules forbidding it, rebuilt on rule changes
+        self._word_index: Dict[str, Set[str]] = {}
+        self._indexed_rules: Optional[Dict[str, PolicyRule]] = None
         
         # Load initial rules
         self._load_rules()
@@ -78,16 +135,20 @@ class PolicyChecker:
             # Get applicable rules
             rules = self._get_applicable_rules(platform, categories)
             
+            # Tokenize once and look up all forbidden words in one pass
+            words = set(re.findall(r'\w+', content_str.lower()))
+            word_hits = self._match_forbidden_words(words)
+            is_image = content.get('type') == 'image'
+            
             # Check each rule
             for rule in rules:
                 # Check regex patterns
-                for pattern in rule.regex_patterns:
-                    matches = re.finditer(pattern, content_str)
-                    for match in matches:
+                for pattern in rule._compiled_regex:
+                    for match in pattern.finditer(content_str):
                         violations.append(
                             PolicyViolation(
                                 rule_id=rule.id,
-                                description=f"Matched forbidden pattern: {pattern}",
+                                description=f"Matched forbidden pattern: {pattern.pattern}",
                                 severity="high",
                                 location=f"pos {match.start()}-{match.end()}",
                                 context=match.group(0),
@@ -96,8 +157,7 @@ class PolicyChecker:
                         )
                 
                 # Check forbidden words
-                words = set(re.findall(r'\w+', content_str.lower()))
-                forbidden = words.intersection(rule.forbidden_words)
+                forbidden = word_hits.get(rule.id)
                 if forbidden:
                     violations.append(
                         PolicyViolation(
@@ -148,6 +208,10 @@ class PolicyChecker:
                             timestamp=datetime.now()
                         )
                     )
+                
+                # Check image constraints
+                if is_image and rule._image_limits is not None:
+                    violations.extend(self._check_image(rule, content))
             
             # Cache results
             content_hash = self._hash_content(content)
@@ -159,6 +223,48 @@ class PolicyChecker:
             self.logger.error(f"Policy check failed: {str(e)}")
             raise
     
+    def _check_image(
+        self,
+        rule: PolicyRule,
+        content: Dict[str, any]
+    ) -> List[PolicyViolation]:
+        """Check image dimensions, size and format against a rule
+        
+        Args:
+            rule: Rule with compiled image limits
+            content: Image content metadata
+            
+        Returns:
+            List of policy violations
+        """
+        min_width, min_height, max_size_kb, formats = rule._image_limits
+        width = content.get('width', 0)
+        height = content.get('height', 0)
+        size_kb = content.get('size_kb', 0)
+        image_format = str(content.get('format', '')).lower()
+        
+        failures = []
+        if width < min_width:
+            failures.append(("dimensions", f"Width {width} below minimum of {min_width}"))
+        if height < min_height:
+            failures.append(("dimensions", f"Height {height} below minimum of {min_height}"))
+        if size_kb > max_size_kb:
+            failures.append(("size", f"Size {size_kb}KB exceeds maximum of {max_size_kb}KB"))
+        if formats and image_format not in formats:
+            failures.append(("format", f"Format {image_format} not in allowed formats"))
+        
+        return [
+            PolicyViolation(
+                rule_id=rule.id,
+                description=description,
+                severity="medium",
+                location=location,
+                context=description,
+                timestamp=datetime.now()
+            )
+            for location, description in failures
+        ]
+    
     def check_campaign(
         self,
         campaign: Dict[str, any],
@@ -217,6 +323,7 @@ class PolicyChecker:
             
             # Clear cache since rules changed
             self.violation_cache.clear()
+            self._indexed_rules = None
             
             self.logger.info(f"Added rule {rule.id}")
             
@@ -243,6 +350,12 @@ class PolicyChecker:
                 if hasattr(rule, key):
                     setattr(rule, key, value)
             
+            # Recompile patterns, raising ValueError if any is invalid
+            if 'regex_patterns' in updates:
+                rule.compile_patterns()
+            if updates.keys() & {'min_width', 'min_height', 'max_size_kb', 'allowed_formats'}:
+                rule.compile_image_limits()
+            
             # Validate updated rule
             if not self._validate_rule(rule):
                 raise ValueError("Invalid rule after update")
@@ -252,6 +365,7 @@ class PolicyChecker:
             
             # Clear cache
             self.violation_cache.clear()
+            self._indexed_rules = None
             
             self.logger.info(f"Updated rule {rule_id}")
             
@@ -274,6 +388,7 @@ class PolicyChecker:
             
             # Clear cache
             self.violation_cache.clear()
+            self._indexed_rules = None
             
             self.logger.info(f"Deleted rule {rule_id}")
             
@@ -288,7 +403,11 @@ class PolicyChecker:
                 rules_data = json.load(f)
             
             for rule_data in rules_data:
-                rule = PolicyRule(**rule_data)
+                try:
+                    rule = PolicyRule(**rule_data)
+                except ValueError as e:
+                    self.logger.warning(f"Skipping rule: {str(e)}")
+                    continue
                 if self._validate_rule(rule):
                     self.rules[rule.id] = rule
             
@@ -312,10 +431,6 @@ class PolicyChecker:
             if not all([rule.id, rule.platform, rule.category]):
                 return False
             
-            # Validate regex patterns
-            for pattern in rule.regex_patterns:
-                re.compile(pattern)
-            
             # Validate lengths
             if rule.max_length is not None and rule.max_length < 0:
                 return False
@@ -360,6 +475,33 @@ class PolicyChecker:
         
         return rules
     
+    def _match_forbidden_words(self, words: Set[str]) -> Dict[str, Set[str]]:
+        """Find forbidden words present in content across all rules
+        
+        Args:
+            words: Lowercased word tokens of the content
+            
+        Returns:
+            Dictionary mapping rule IDs to the forbidden words found
+        """
+        if self._indexed_rules is not self.rules:
+            self._rebuild_word_index()
+        
+        hits: Dict[str, Set[str]] = {}
+        for word in words & self._word_index.keys():
+            for rule_id in self._word_index[word]:
+                hits.setdefault(rule_id, set()).add(word)
+        return hits
+    
+    def _rebuild_word_index(self) -> None:
+        """Index forbidden words of all rules by word"""
+        index: Dict[str, Set[str]] = {}
+        for rule in self.rules.values():
+            for word in rule.forbidden_words:
+                index.setdefault(word, set()).add(rule.id)
+        self._word_index = index
+        self._indexed_rules = self.rules
+    
     def _prepare_content(self, content: Dict[str, any]) -> str:
         """Prepare content for checking
         
@@ -374,7 +516,7 @@ class PolicyChecker:
             return json.dumps(content)
         return str(content)
     
-    def _hash_content(self, content: Dict[str, any]) -> str:
+    def _hash_content(self, content: Dict[str, any]) -> bytes:
         """Generate hash for content
         
         Args:
@@ -383,4 +525,4 @@ class PolicyChecker:
         Returns:
             Content hash
         """
-        return str(hash(json.dumps(content, sort_keys=True)))
\ No newline at end of file
+        return _content_key(content)
\ No newline at end of file
@@ -4,20 +4,26 @@ This module implements automated compliance reporting for ad campaigns,
 generating detailed reports and alerts for compliance issues.
 """
 
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Union
+from collections.abc import Mapping as MappingABC
+from concurrent.futures import Future, ThreadPoolExecutor
+import itertools
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import json
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 
-@dataclass
+from ..utils.compat import DATACLASS_SLOTS
+
+@dataclass(**DATACLASS_SLOTS)
 class ComplianceAlert:
     """Represents a compliance alert"""
     id: str
@@ -31,7 +37,7 @@ class ComplianceAlert:
     is_resolved: bool = False
     resolution_notes: Optional[str] = None
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ComplianceReport:
     """Represents a compliance report"""
     id: str
@@ -40,9 +46,87 @@ class ComplianceReport:
     summary: Dict[str, any]
     alerts: List[ComplianceAlert]
     metrics: Dict[str, float]
-    charts: Dict[str, str]
+    charts: Mapping[str, str]
     timestamp: datetime
 
+# Alert severities, in severity-code order
+SEVERITY_LEVELS = ('low', 'medium', 'high')
+_SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITY_LEVELS)}
+
+# Severities outside SEVERITY_LEVELS (e.g. 'critical' from an upstream
+# system) are counted in a trailing 'other' bucket rather than dropped
+_OTHER_SEVERITY_CODE = len(SEVERITY_LEVELS)
+_SEVERITY_LABELS = SEVERITY_LEVELS + ('other',)
+
+class _LazyCharts(MappingABC):
+    """Read-only chart mapping whose HTML is rendered in the background
+    
+    Accessing a chart blocks until its rendering future completes.
+    """
+    
+    def __init__(self, futures: Dict[str, Future]):
+        self._futures = futures
+    
+    def __getitem__(self, name: str) -> str:
+        return self._futures[name].result()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._futures)
+    
+    def __len__(self) -> int:
+        return len(self._futures)
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._futures
+
+def _render_severity_chart(severity_counts: np.ndarray) -> str:
+    """Render the severity distribution pie chart
+    
+    Args:
+        severity_counts: Alert counts indexed by severity code
+        
+    Returns:
+        Chart HTML
+    """
+    present = np.flatnonzero(severity_counts)
+    fig = go.Figure(data=[
+        go.Pie(
+            labels=[_SEVERITY_LABELS[i] for i in present],
+            values=severity_counts[present],
+            hole=.3
+        )
+    ])
+    return fig.to_html(
+        full_html=False,
+        include_plotlyjs='cdn'
+    )
+
+def _render_trend_chart(timestamps: np.ndarray) -> str:
+    """Render the daily alert count trend chart
+    
+    Args:
+        timestamps: Alert timestamps as datetime64
+        
+    Returns:
+        Chart HTML
+    """
+    days = timestamps.astype('datetime64[D]')
+    first_day = days.min()
+    daily_counts = np.bincount((days - first_day).astype(np.int64))
+    dates = first_day + np.arange(daily_counts.size)
+    
+    fig = go.Figure(data=[
+        go.Scatter(
+            x=dates.astype(object),
+            y=daily_counts,
+            mode='lines+markers'
+        )
+    ])
+    return fig.to_html(
+        full_html=False,
+        include_plotlyjs='cdn'
+    )
+
 class ComplianceReporter:
     """Generates compliance reports and alerts"""
     
@@ -59,9 +143,38 @@ class ComplianceReporter:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.alerts: List[ComplianceAlert] = []
+        
+        # Alert ID -> alert, rebuilt when self.alerts is replaced
+        self._alert_index: Dict[str, ComplianceAlert] = {}
+        self._indexed_alerts: Optional[List[ComplianceAlert]] = None
+        
+        # Sequence suffix that keeps alert IDs created in the same second unique
+        self._alert_sequence = itertools.count(1)
+        
+        # Alert timestamps in list order, plus their sort order, extended as
+        # alerts are appended and rebuilt when self.alerts is replaced
+        self._timeline_alerts: Optional[List[ComplianceAlert]] = None
+        self._timeline_times = np.empty(0, dtype='datetime64[us]')
+        self._timeline_order = np.empty(0, dtype=np.int64)
+        
+        # Templates are compiled once; set template_auto_reload to pick up edits
         self.template_env = Environment(
-            loader=FileSystemLoader(config['templates_path'])
+            loader=FileSystemLoader(config['templates_path']),
+            auto_reload=config.get('template_auto_reload', False)
         )
+        self._templates: Dict[str, Template] = {}
+        
+        # Renders charts off the request path
+        self._chart_pool = ThreadPoolExecutor(max_workers=config.get('chart_workers', 2))
+        
+        # Severity thresholds, read once instead of per alert
+        thresholds = config['alert_thresholds']
+        self._high_threshold = float(thresholds['high'])
+        self._medium_threshold = float(thresholds['medium'])
+        
+        # Reused SMTP connection when smtp_pool is enabled
+        self._smtp_lock = threading.Lock()
+        self._smtp: Optional[smtplib.SMTP_SSL] = None
     
     def create_alert(
         self,
@@ -95,12 +208,12 @@ class ComplianceReporter:
             resolution_notes: Notes about resolution
         """
         try:
-            alert = next(
-                (a for a in self.alerts if a.id == alert_id),
-                None
-            )
+            if self._indexed_alerts is not self.alerts:
+                self._alert_index = {a.id: a for a in self.alerts}
+                self._indexed_alerts = self.alerts
+            alert = self._alert_index.get(alert_id)
             
-            if not alert:
+            if alert is None:
                 raise ValueError(f"Alert {alert_id} not found")
             
             alert.is_resolved = True
@@ -126,29 +239,38 @@ class ComplianceReporter:
             report_type: Type of report to generate
             
         Returns:
-            Generated compliance report
+            Generated compliance report; charts render in the background
         """
         try:
-            # Get alerts for period
-            period_alerts = [
-                alert for alert in self.alerts
-                if start_date <= alert.timestamp <= end_date
-            ]
+            # Binary search the sorted timeline for alerts in period
+            times, order = self._alert_timeline()
+            sorted_times = times[order]
+            lo = np.searchsorted(sorted_times, np.datetime64(start_date, 'us'), side='left')
+            hi = np.searchsorted(sorted_times, np.datetime64(end_date, 'us'), side='right')
+            period_idx = np.sort(order[lo:hi])
+            period_alerts = [self.alerts[i] for i in period_idx]
             
-            # Calculate metrics
-            metrics = self._calculate_metrics(period_alerts)
+            # Only alerts in period are converted to columns
+            columns = self._alert_columns(period_alerts)
+            
+            # Count alerts per severity code in one pass
+            severity_counts = np.bincount(
+                columns['severity'],
+                minlength=len(_SEVERITY_LABELS)
+            )
             
-            # Generate charts
-            charts = self._generate_charts(period_alerts)
+            # Start charts first so rendering overlaps metrics, summary and
+            # template loading; _export_report resolves them last
+            charts = self._generate_charts(columns, severity_counts)
+            
+            # Calculate metrics
+            metrics = self._calculate_metrics(columns)
             
             # Create summary
             summary = {
-                'total_alerts': len(period_alerts),
-                'resolved_alerts': len([a for a in period_alerts if a.is_resolved]),
-                'high_severity': len([
-                    a for a in period_alerts
-                    if a.severity == 'high'
-                ]),
+                'total_alerts': int(period_idx.size),
+                'resolved_alerts': int(columns['resolved'].sum()),
+                'high_severity': int(severity_counts[_SEVERITY_CODES['high']]),
                 'compliance_rate': metrics['compliance_rate']
             }
             
@@ -192,7 +314,7 @@ class ComplianceReporter:
             msg['To'] = ', '.join(recipients)
             
             # Add report content
-            template = self.template_env.get_template('report_email.html')
+            template = self._get_template('report_email.html')
             html = template.render(report=report)
             msg.attach(MIMEText(html, 'html'))
             
@@ -208,15 +330,7 @@ class ComplianceReporter:
                 msg.attach(pdf)
             
             # Send email
-            with smtplib.SMTP_SSL(
-                self.config['smtp_config']['host'],
-                self.config['smtp_config']['port']
-            ) as server:
-                server.login(
-                    self.config['smtp_config']['username'],
-                    self.config['smtp_config']['password']
-                )
-                server.send_message(msg)
+            self._send_message(msg)
             
             self.logger.info(f"Sent report {report.id} to {len(recipients)} recipients")
             
@@ -224,6 +338,52 @@ class ComplianceReporter:
             self.logger.error(f"Report sending failed: {str(e)}")
             raise
     
+    def _connect_smtp(self) -> smtplib.SMTP_SSL:
+        """Open and authenticate an SMTP connection"""
+        smtp_config = self.config['smtp_config']
+        server = smtplib.SMTP_SSL(smtp_config['host'], smtp_config['port'])
+        server.login(smtp_config['username'], smtp_config['password'])
+        return server
+    
+    def _send_message(self, msg: MIMEMultipart) -> None:
+        """Send message, reusing a pooled connection if configured
+        
+        Args:
+            msg: Message to send
+        """
+        if not self.config.get('smtp_pool', False):
+            smtp_config = self.config['smtp_config']
+            with smtplib.SMTP_SSL(smtp_config['host'], smtp_config['port']) as server:
+                server.login(smtp_config['username'], smtp_config['password'])
+                server.send_message(msg)
+            return
+        
+        with self._smtp_lock:
+            if self._smtp is None:
+                self._smtp = self._connect_smtp()
+            try:
+                self._smtp.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Server dropped the idle connection; reconnect once
+                self._smtp = self._connect_smtp()
+                self._smtp.send_message(msg)
+    
+    def close(self) -> None:
+        """Close the pooled SMTP connection and stop the chart pool
+        
+        Charts already submitted finish rendering; no reports can be
+        generated afterwards.
+        """
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except smtplib.SMTPException:
+                    pass
+                self._smtp = None
+        
+        self._chart_pool.shutdown(wait=True)
+    
     def _process_violation(self, violation: Dict[str, any]) -> None:
         """Process violation and create alert
         
@@ -234,19 +394,22 @@ class ComplianceReporter:
         severity = self._determine_severity(violation)
         
         # Create alert
+        now = datetime.now()
         alert = ComplianceAlert(
-            id=f"ALT_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            id=f"ALT_{now.strftime('%Y%m%d_%H%M%S')}_{next(self._alert_sequence):06d}",
             severity=severity,
             title=violation['title'],
             description=violation['description'],
             content_id=violation['content_id'],
             violation_type=violation['type'],
             details=violation.get('details', {}),
-            timestamp=datetime.now()
+            timestamp=now
         )
         
         # Add to alerts
         self.alerts.append(alert)
+        if self._indexed_alerts is self.alerts:
+            self._alert_index[alert.id] = alert
         
         # Send immediate alert if high severity
         if severity == 'high':
@@ -261,11 +424,11 @@ class ComplianceReporter:
         Returns:
             Severity level
         """
-        thresholds = self.config['alert_thresholds']
+        impact_score = violation.get('impact_score', 0)
         
-        if violation.get('impact_score', 0) >= thresholds['high']:
+        if impact_score >= self._high_threshold:
             return 'high'
-        elif violation.get('impact_score', 0) >= thresholds['medium']:
+        elif impact_score >= self._medium_threshold:
             return 'medium'
         else:
             return 'low'
@@ -284,37 +447,96 @@ class ComplianceReporter:
             msg['To'] = ', '.join(self.config['alert_recipients'])
             
             # Add alert content
-            template = self.template_env.get_template('alert_email.html')
+            template = self._get_template('alert_email.html')
             html = template.render(alert=alert)
             msg.attach(MIMEText(html, 'html'))
             
             # Send email
-            with smtplib.SMTP_SSL(
-                self.config['smtp_config']['host'],
-                self.config['smtp_config']['port']
-            ) as server:
-                server.login(
-                    self.config['smtp_config']['username'],
-                    self.config['smtp_config']['password']
-                )
-                server.send_message(msg)
+            self._send_message(msg)
             
         except Exception as e:
             self.logger.error(f"Immediate alert sending failed: {str(e)}")
     
-    def _calculate_metrics(
+    def _alert_timeline(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get alert timestamps and the order that sorts them
+        
+        Appended alerts are converted incrementally; the sort order is only
+        recomputed if they arrive out of time order.
+        
+        Returns:
+            Tuple of datetime64 timestamps aligned with self.alerts and
+            indices sorting them ascending
+        """
+        start = len(self._timeline_times)
+        if self._timeline_alerts is not self.alerts or start > len(self.alerts):
+            start = 0
+            self._timeline_times = self._timeline_times[:0]
+            self._timeline_order = self._timeline_order[:0]
+            self._timeline_alerts = self.alerts
+        
+        if start < len(self.alerts):
+            new_times = np.array(
+                [a.timestamp for a in self.alerts[start:]],
+                dtype='datetime64[us]'
+            ).reshape(-1)
+            in_order = (
+                (start == 0 or new_times[0] >= self._timeline_times[self._timeline_order[-1]]) and
+                bool(np.all(new_times[1:] >= new_times[:-1]))
+            )
+            self._timeline_times = np.concatenate([self._timeline_times, new_times])
+            if in_order:
+                self._timeline_order = np.concatenate([
+                    self._timeline_order,
+                    np.arange(start, len(self._timeline_times))
+                ])
+            else:
+                self._timeline_order = np.argsort(self._timeline_times, kind='stable')
+        
+        return self._timeline_times, self._timeline_order
+    
+    def _alert_columns(
         self,
         alerts: List[ComplianceAlert]
+    ) -> Dict[str, np.ndarray]:
+        """Convert alerts into column arrays for vectorized aggregation
+        
+        Args:
+            alerts: List of alerts
+            
+        Returns:
+            Dictionary with severity codes, resolved flags and timestamps;
+            unknown severities get the 'other' code
+        """
+        return {
+            'severity': np.fromiter(
+                (_SEVERITY_CODES.get(a.severity, _OTHER_SEVERITY_CODE) for a in alerts),
+                dtype=np.int8,
+                count=len(alerts)
+            ),
+            'resolved': np.fromiter(
+                (a.is_resolved for a in alerts),
+                dtype=bool,
+                count=len(alerts)
+            ),
+            'timestamp': np.array(
+                [a.timestamp for a in alerts],
+                dtype='datetime64[us]'
+            ).reshape(-1)
+        }
+    
+    def _calculate_metrics(
+        self,
+        columns: Dict[str, np.ndarray]
     ) -> Dict[str, float]:
         """Calculate compliance metrics
         
         Args:
-            alerts: List of alerts to analyze
+            columns: Alert columns from _alert_columns
             
         Returns:
             Dictionary of metrics
         """
-        total = len(alerts)
+        total = columns['severity'].size
         if total == 0:
             return {
                 'compliance_rate': 100.0,
@@ -322,74 +544,68 @@ class ComplianceReporter:
                 'avg_resolution_time': 0.0
             }
         
-        resolved = len([a for a in alerts if a.is_resolved])
+        resolved = columns['resolved']
         
-        # Calculate resolution times
-        resolution_times = []
-        for alert in alerts:
-            if alert.is_resolved:
-                resolution_time = (
-                    datetime.now() - alert.timestamp
-                ).total_seconds() / 3600  # hours
-                resolution_times.append(resolution_time)
+        # Calculate resolution times in hours
+        resolution_times = (
+            np.datetime64(datetime.now()) - columns['timestamp'][resolved]
+        ) / np.timedelta64(1, 'h')
         
         return {
             'compliance_rate': (1 - (total / self.config['baseline_volume'])) * 100,
-            'resolution_rate': (resolved / total) * 100,
-            'avg_resolution_time': sum(resolution_times) / len(resolution_times) if resolution_times else 0
+            'resolution_rate': float(resolved.mean()) * 100,
+            'avg_resolution_time': float(resolution_times.mean()) if resolution_times.size else 0
         }
     
     def _generate_charts(
         self,
-        alerts: List[ComplianceAlert]
-    ) -> Dict[str, str]:
-        """Generate charts for report
+        columns: Dict[str, np.ndarray],
+        severity_counts: Optional[np.ndarray] = None
+    ) -> Mapping[str, str]:
+        """Start rendering charts for report in the background
         
         Args:
-            alerts: List of alerts to visualize
+            columns: Alert columns from _alert_columns
+            severity_counts: Alert counts per severity code, computed from
+                columns if not given
             
         Returns:
-            Dictionary mapping chart names to HTML
+            Mapping of chart names to HTML, rendered on first access
         """
-        charts = {}
-        
-        # Severity distribution
-        severity_counts = pd.Series([a.severity for a in alerts]).value_counts()
-        fig = go.Figure(data=[
-            go.Pie(
-                labels=severity_counts.index,
-                values=severity_counts.values,
-                hole=.3
+        if columns['severity'].size == 0:
+            return _LazyCharts({})
+        
+        if severity_counts is None:
+            severity_counts = np.bincount(
+                columns['severity'],
+                minlength=len(_SEVERITY_LABELS)
             )
-        ])
-        charts['severity_distribution'] = fig.to_html(
-            full_html=False,
-            include_plotlyjs='cdn'
-        )
         
-        # Alert trend
-        dates = pd.date_range(
-            min(a.timestamp for a in alerts),
-            max(a.timestamp for a in alerts),
-            freq='D'
-        )
-        daily_counts = pd.Series(
-            [a.timestamp.date() for a in alerts]
-        ).value_counts().reindex(dates.date, fill_value=0)
-        
-        fig = go.Figure(data=[
-            go.Scatter(
-                x=daily_counts.index,
-                y=daily_counts.values,
-                mode='lines+markers'
+        return _LazyCharts({
+            'severity_distribution': self._chart_pool.submit(
+                _render_severity_chart,
+                severity_counts
+            ),
+            'alert_trend': self._chart_pool.submit(
+                _render_trend_chart,
+                columns['timestamp']
             )
-        ])
-        charts['alert_trend'] = fig.to_html(
-            full_html=False,
-            include_plotlyjs='cdn'
-        )
+        })
+    
+    def _get_template(self, name: str) -> Template:
+        """Get compiled template, loading it on first use
         
-        return charts
+        Args:
+            name: Template file name
+            
+        Returns:
+            Compiled template
+        """
+        template = self._templates.get(name)
+        if template is None:
+            template = self.template_env.get_template(name)
+            self._templates[name] = template
+        return template
     
     def _export_report(
         self,
@@ -404,7 +620,7 @@ class ComplianceReporter:
         """
         try:
             # Get template
-            template = self.template_env.get_template(f"{report_type}_report.html")
+            template = self._get_template(f"{report_type}_report.html")
             
             # Render report
             html = template.render(report=report)
@@ -4,15 +4,69 @@ This module implements the TikTok Ads API integration for managing
 ad campaigns on the TikTok advertising platform.
 """
 
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import requests
 import json
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pyrate_limiter import BucketFullException, Duration, Limiter, LimiterDelayException, Rate
+import orjson
+import simdjson
 
 from .base import PlatformConnector
 
+_CAMPAIGN_STATS_FIELDS = (
+    "campaign_id",
+    "campaign_name",
+    "objective_type",
+    "status",
+    "budget",
+    "budget_mode",
+    "spend",
+    "impressions",
+    "clicks",
+    "ctr",
+    "conversion",
+    "cost_per_conversion"
+)
+
+_AD_STATS_FIELDS = (
+    "ad_id",
+    "ad_name",
+    "status",
+    "spend",
+    "impressions",
+    "clicks",
+    "ctr",
+    "conversion",
+    "cost_per_conversion",
+    "engagement_rate",
+    "video_play_actions",
+    "video_watched_2s",
+    "video_watched_6s"
+)
+
+# Stats responses larger than this are parsed on demand with simdjson; below it
+# orjson's full parse is cheaper
+_SIMDJSON_MIN_BYTES = 64_000
+
+
+def _plain(value):
+    """Convert simdjson containers into Python dicts and lists"""
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
+
+def _extract_fields(row, fields: tuple) -> Dict[str, any]:
+    """Copy the requested fields of a stats row into a plain dict"""
+    return {field: _plain(row.get(field)) for field in fields}
+
+
 class TikTokAdsConnector(PlatformConnector):
     """TikTok Ads platform connector implementation"""
     
@@ -27,6 +81,8 @@ class TikTokAdsConnector(PlatformConnector):
                 - advertiser_id: TikTok advertiser ID
                 - app_id: TikTok app ID
                 - secret: TikTok app secret
+                - requests_per_second: Optional client-side rate limit
+                  (defaults to 10)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -37,10 +93,41 @@ class TikTokAdsConnector(PlatformConnector):
         try:
             self.headers = {
                 "Access-Token": self.config['access_token'],
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                "Accept-Encoding": "br, gzip"
             }
             self.advertiser_id = self.config['advertiser_id']
             
+            # Reads retry throttled and transient failures, honoring Retry-After
+            read_retry = Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+                allowed_methods=frozenset(['GET'])
+            )
+            self.session = requests.Session()
+            self.session.mount("https://", HTTPAdapter(max_retries=read_retry))
+            
+            # Writes are not idempotent: a 5xx or read timeout may follow a
+            # successful create, so only retry throttling and failed connects
+            write_retry = Retry(
+                total=5,
+                read=0,
+                backoff_factor=0.5,
+                status_forcelist=[429],
+                respect_retry_after_header=True,
+                allowed_methods=frozenset(['POST'])
+            )
+            self._write_session = requests.Session()
+            self._write_session.mount("https://", HTTPAdapter(max_retries=write_retry))
+            
+            # Smooth out bursts (e.g. stats fan-out) before they hit the API
+            self.rate_limiter = Limiter(
+                Rate(self.config.get('requests_per_second', 10), Duration.SECOND),
+                max_delay=Duration.SECOND * 2
+            )
+            
         except Exception as e:
             self.logger.error(f"Error initializing TikTok Ads client: {str(e)}")
             raise
@@ -53,7 +140,7 @@ class TikTokAdsConnector(PlatformConnector):
         """Make HTTP request to TikTok Ads API
         
         Args:
-            endpoint: API endpoint
+            endpoint: API endpoint, relative to BASE_URL (no leading slash)
             method: HTTP method
             params: Query parameters
             data: Request body data
@@ -61,10 +148,68 @@ class TikTokAdsConnector(PlatformConnector):
         Returns:
             API response data
         """
+        return orjson.loads(self._send_request(endpoint, method, params, data).content)
+    
+    def _get_stats_rows(self,
+                        endpoint: str,
+                        params: Dict,
+                        fields: tuple) -> Tuple[int, Optional[str], List[Dict[str, any]]]:
+        """Fetch a stats list, copying only the requested fields of each row
+        
+        Large responses are parsed on demand with simdjson, so fields that
+        are not requested are never materialized.
+        
+        Args:
+            endpoint: API endpoint, relative to BASE_URL (no leading slash)
+            params: Query parameters
+            fields: Row fields to extract
+            
+        Returns:
+            Tuple of (response code, message, rows as plain dicts); rows
+            are empty unless the code is 0
+        """
+        content = self._send_request(endpoint, params=params).content
+        if len(content) > _SIMDJSON_MIN_BYTES:
+            # The parser must outlive every access to the document
+            parser = simdjson.Parser()
+            response = parser.parse(content)
+        else:
+            response = orjson.loads(content)
+        
+        code = response.get("code")
+        if code != 0:
+            return code, response.get("message"), []
+        rows = [_extract_fields(row, fields) for row in response["data"]["list"]]
+        return code, response.get("message"), rows
+    
+    def _send_request(self,
+                      endpoint: str,
+                      method: str = "GET",
+                      params: Dict = None,
+                      data: Dict = None) -> requests.Response:
+        """Send a rate-limited HTTP request to TikTok Ads API
+        
+        Args:
+            endpoint: API endpoint, relative to BASE_URL (no leading slash)
+            method: HTTP method
+            params: Query parameters
+            data: Request body data
+            
+        Returns:
+            Successful HTTP response
+            
+        Raises:
+            BucketFullException: If the client-side rate limit is exhausted
+            LimiterDelayException: If waiting for the rate limit would take
+                longer than the allowed delay
+            requests.exceptions.RequestException: If the request fails
+        """
         try:
-            url = urljoin(self.BASE_URL, endpoint)
+            url = self.BASE_URL + endpoint
             
-            response = requests.request(
+            self.rate_limiter.try_acquire(self.advertiser_id)
+            session = self.session if method == "GET" else self._write_session
+            response = session.request(
                 method=method,
                 url=url,
                 headers=self.headers,
@@ -73,8 +218,11 @@ class TikTokAdsConnector(PlatformConnector):
             )
             
             response.raise_for_status()
-            return response.json()
+            return response
             
+        except (BucketFullException, LimiterDelayException) as e:
+            self.logger.error(f"API request rate limited: {str(e).strip()}")
+            raise
         except requests.exceptions.RequestException as e:
             self.logger.error(f"API request failed: {str(e)}")
             raise
@@ -179,35 +327,67 @@ class TikTokAdsConnector(PlatformConnector):
             params = {
                 "advertiser_id": self.advertiser_id,
                 "campaign_ids": [campaign_id],
-                "fields": [
-                    "campaign_id",
-                    "campaign_name",
-                    "objective_type",
-                    "status",
-                    "budget",
-                    "budget_mode",
-                    "spend",
-                    "impressions",
-                    "clicks",
-                    "ctr",
-                    "conversion",
-                    "cost_per_conversion"
-                ],
+                "fields": _CAMPAIGN_STATS_FIELDS,
                 "start_date": (
                     datetime.now() - timedelta(days=30)
                 ).strftime("%Y-%m-%d"),
                 "end_date": datetime.now().strftime("%Y-%m-%d")
             }
             
-            response = self._make_request(
-                endpoint="campaign/get/",
-                params=params
+            code, message, rows = self._get_stats_rows(
+                "campaign/get/",
+                params,
+                _CAMPAIGN_STATS_FIELDS
             )
             
-            if response.get("code") == 0 and response["data"]["list"]:
-                return response["data"]["list"][0]
+            if code == 0 and rows:
+                return rows[0]
             else:
-                raise Exception(f"Failed to get campaign stats: {response.get('message')}")
+                raise Exception(f"Failed to get campaign stats: {message}")
+            
+        except Exception as e:
+            self.logger.error(f"Error getting campaign stats: {str(e)}")
+            raise
+    
+    def get_campaigns_stats(self,
+                            campaign_ids: List[str],
+                            page_size: int = 100) -> Dict[str, Dict[str, any]]:
+        """Get performance statistics for several campaigns at once
+        
+        Args:
+            campaign_ids: IDs of campaigns to get stats for
+            page_size: Maximum number of campaign IDs sent per request
+            
+        Returns:
+            Dictionary mapping campaign IDs to their statistics
+        """
+        try:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=30)
+            stats = {}
+            
+            for offset in range(0, len(campaign_ids), page_size):
+                params = {
+                    "advertiser_id": self.advertiser_id,
+                    "campaign_ids": campaign_ids[offset:offset + page_size],
+                    "fields": _CAMPAIGN_STATS_FIELDS,
+                    "start_date": start_date.strftime("%Y-%m-%d"),
+                    "end_date": end_date.strftime("%Y-%m-%d")
+                }
+                
+                code, message, rows = self._get_stats_rows(
+                    "campaign/get/",
+                    params,
+                    _CAMPAIGN_STATS_FIELDS
+                )
+                
+                if code != 0:
+                    raise Exception(f"Failed to get campaign stats: {message}")
+                
+                for row in rows:
+                    stats[row["campaign_id"]] = row
+            
+            return stats
             
         except Exception as e:
             self.logger.error(f"Error getting campaign stats: {str(e)}")
@@ -297,36 +477,23 @@ class TikTokAdsConnector(PlatformConnector):
             params = {
                 "advertiser_id": self.advertiser_id,
                 "ad_ids": [ad_id],
-                "fields": [
-                    "ad_id",
-                    "ad_name",
-                    "status",
-                    "spend",
-                    "impressions",
-                    "clicks",
-                    "ctr",
-                    "conversion",
-                    "cost_per_conversion",
-                    "engagement_rate",
-                    "video_play_actions",
-                    "video_watched_2s",
-                    "video_watched_6s"
-                ],
+                "fields": _AD_STATS_FIELDS,
                 "start_date": (
                     datetime.now() - timedelta(days=30)
                 ).strftime("%Y-%m-%d"),
                 "end_date": datetime.now().strftime("%Y-%m-%d")
             }
             
-            response = self._make_request(
-                endpoint="ad/get/",
-                params=params
+            code, message, rows = self._get_stats_rows(
+                "ad/get/",
+                params,
+                _AD_STATS_FIELDS
             )
             
-            if response.get("code") == 0 and response["data"]["list"]:
-                return response["data"]["list"][0]
+            if code == 0 and rows:
+                return rows[0]
             else:
-                raise Exception(f"Failed to get ad stats: {response.get('message')}")
+                raise Exception(f"Failed to get ad stats: {message}")
             
         except Exception as e:
             self.logger.error(f"Error getting ad stats: {str(e)}")
@@ -4,16 +4,82 @@ This module handles real-time budget optimization across campaigns and ad sets
 using reinforcement learning to maximize ROAS.
 """
 
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Mapping, Optional, Tuple
+from collections.abc import Mapping as MappingABC
+from dataclasses import dataclass, replace
 import logging
 from datetime import datetime, timedelta
+from pathlib import Path
+import joblib
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
-from tensorflow import keras
 
-@dataclass
+from ..utils.compat import DATACLASS_SLOTS
+
+if TYPE_CHECKING:
+    from tensorflow import keras
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; fall back to NumPy kernels
+    njit = None
+
+
+def _constrain_budgets_numpy(budgets: np.ndarray,
+                             min_budget: float,
+                             total_budget: float) -> np.ndarray:
+    """Clamp budgets to the minimum and rescale them to fit the total in place"""
+    np.maximum(budgets, min_budget, out=budgets)
+    total_allocated = budgets.sum()
+    if total_allocated > total_budget:
+        budgets *= total_budget / total_allocated
+    return budgets
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _constrain_budgets(budgets, min_budget, total_budget):
+        """Fused clamp + rescale kernel, see _constrain_budgets_numpy"""
+        n = budgets.shape[0]
+        for i in prange(n):
+            if budgets[i] < min_budget:
+                budgets[i] = min_budget
+        total_allocated = budgets.sum()
+        if total_allocated > total_budget:
+            scale = total_budget / total_allocated
+            for i in prange(n):
+                budgets[i] *= scale
+        return budgets
+else:
+    _constrain_budgets = _constrain_budgets_numpy
+
+
+def _state_features_numpy(spend, revenue, roas, cpa, conversions, clicks, impressions):
+    """Build the (N, 6) per-campaign state feature matrix from metric columns"""
+    ctr = np.zeros(clicks.shape, dtype=np.float64)
+    np.divide(clicks, impressions, out=ctr, where=impressions > 0)
+    return np.column_stack([spend, revenue, roas, cpa, conversions, ctr])
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _state_features(spend, revenue, roas, cpa, conversions, clicks, impressions):
+        """Single-pass, branch-free state feature kernel, see _state_features_numpy"""
+        n = spend.shape[0]
+        features = np.empty((n, 6), dtype=np.float64)
+        for i in range(n):
+            features[i, 0] = spend[i]
+            features[i, 1] = revenue[i]
+            features[i, 2] = roas[i]
+            features[i, 3] = cpa[i]
+            features[i, 4] = conversions[i]
+            # CTR is zero without impressions; the mask avoids a data-dependent branch
+            features[i, 5] = (impressions[i] > 0) * clicks[i] / max(impressions[i], 1)
+        return features
+else:
+    _state_features = _state_features_numpy
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class BudgetAllocation:
     """Data class to store budget allocation details"""
     campaign_id: str
@@ -23,7 +89,7 @@ class BudgetAllocation:
     confidence: float
     reasoning: str
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class CampaignMetrics:
     """Data class to store campaign performance metrics"""
     campaign_id: str
@@ -36,6 +102,103 @@ class CampaignMetrics:
     cpa: float
     timestamp: datetime
 
+def _metric_column(name: str) -> property:
+    """Expose the filled part of a CampaignMetricsStore column"""
+    return property(lambda self: self._columns[name][:len(self.ids)])
+
+# Metric columns passed to _state_features, in argument order
+_STATE_COLUMNS = ('spend', 'revenue', 'roas', 'cpa', 'conversions', 'clicks', 'impressions')
+
+class CampaignMetricsStore(MappingABC):
+    """Columnar (struct-of-arrays) storage for campaign metrics
+    
+    Each metric lives in its own contiguous array so state extraction is a
+    sweep over columns. Indexing by campaign ID returns the CampaignMetrics
+    last stored for it, so the store can be passed wherever a metrics dict
+    is expected.
+    """
+    
+    _DTYPES = {
+        'spend': np.float64,
+        'revenue': np.float64,
+        'impressions': np.int64,
+        'clicks': np.int64,
+        'conversions': np.int64,
+        'roas': np.float64,
+        'cpa': np.float64
+    }
+    
+    spend = _metric_column('spend')
+    revenue = _metric_column('revenue')
+    impressions = _metric_column('impressions')
+    clicks = _metric_column('clicks')
+    conversions = _metric_column('conversions')
+    roas = _metric_column('roas')
+    cpa = _metric_column('cpa')
+    
+    def __init__(self, capacity: int = 64):
+        """Initialize an empty store
+        
+        Args:
+            capacity: Initial number of campaign slots per column
+        """
+        self.ids: List[str] = []
+        self._records: List[CampaignMetrics] = []
+        self._index: Dict[str, int] = {}
+        self._columns = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in self._DTYPES.items()
+        }
+    
+    @classmethod
+    def from_metrics(cls,
+                     campaign_metrics: Mapping[str, CampaignMetrics]) -> 'CampaignMetricsStore':
+        """Build a store from a mapping of campaign IDs to metrics"""
+        store = cls(capacity=max(len(campaign_metrics), 1))
+        for campaign_id, metrics in campaign_metrics.items():
+            store.update(campaign_id, metrics)
+        return store
+    
+    def update(self, campaign_id: str, metrics: CampaignMetrics):
+        """Insert or overwrite the metrics of a campaign
+        
+        Args:
+            campaign_id: Campaign identifier
+            metrics: Latest campaign metrics
+        """
+        row = self._index.get(campaign_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self._columns['spend']):
+                self._grow()
+            self._index[campaign_id] = row
+            self.ids.append(campaign_id)
+            self._records.append(metrics)
+        else:
+            self._records[row] = metrics
+        
+        for name, column in self._columns.items():
+            column[row] = getattr(metrics, name)
+    
+    def _grow(self):
+        """Double the capacity of every column"""
+        for name, column in self._columns.items():
+            grown = np.zeros(max(len(column) * 2, 1), dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+    
+    def __getitem__(self, campaign_id: str) -> CampaignMetrics:
+        return self._records[self._index[campaign_id]]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, campaign_id: object) -> bool:
+        return campaign_id in self._index
+
 class BudgetOptimizer:
     """Handles real-time budget optimization using reinforcement learning"""
     
@@ -48,7 +211,8 @@ class BudgetOptimizer:
                 - min_campaign_budget: Minimum budget per campaign
                 - risk_tolerance: Risk tolerance level (0-1)
                 - optimization_window: Time window for optimization
-                - model_config: RL model configuration
+                - model_config: RL model configuration (optional state_dir
+                  to persist and warm-start the model and scaler)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -62,6 +226,13 @@ class BudgetOptimizer:
             # Initialize RL model
             self.model = self._build_rl_model()
             
+            # NumPy copies of the model weights used for inference; Keras
+            # is only needed to train them
+            self._layers: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+            
+            # Warm-start from persisted state when available
+            self._load_state()
+            
             # Initialize state history
             self.state_history = []
             
@@ -70,12 +241,13 @@ class BudgetOptimizer:
             raise
     
     def optimize_budgets(self,
-                        campaign_metrics: Dict[str, CampaignMetrics],
+                        campaign_metrics: Mapping[str, CampaignMetrics],
                         total_budget: float) -> Dict[str, BudgetAllocation]:
         """Optimize budget allocation across campaigns
         
         Args:
-            campaign_metrics: Dictionary mapping campaign IDs to their metrics
+            campaign_metrics: Dictionary or CampaignMetricsStore mapping
+                campaign IDs to their metrics
             total_budget: Total budget to allocate
             
         Returns:
@@ -111,6 +283,77 @@ class BudgetOptimizer:
             # Fallback to proportional allocation
             return self._fallback_allocation(campaign_metrics, total_budget)
     
+    def batch_optimize_budgets(self,
+                               requests: List[Tuple[Dict[str, CampaignMetrics], float]]) -> List[Dict[str, BudgetAllocation]]:
+        """Optimize several independent budget allocations together
+        
+        States matching the RL model's input width are stacked so the model
+        runs one matrix forward pass instead of one pass per request. Any
+        request that cannot be optimized falls back to proportional
+        allocation, as in optimize_budgets.
+        
+        Args:
+            requests: List of (campaign_metrics, total_budget) tuples, where
+                campaign_metrics is a dictionary or CampaignMetricsStore
+            
+        Returns:
+            List of allocation dictionaries aligned with requests
+        """
+        results: List[Optional[Dict[str, BudgetAllocation]]] = [None] * len(requests)
+        prepared: List[Tuple[int, Mapping[str, CampaignMetrics], float, np.ndarray]] = []
+        
+        # Prepare states
+        for idx, (campaign_metrics, total_budget) in enumerate(requests):
+            try:
+                self._validate_inputs(campaign_metrics, total_budget)
+                prepared.append((idx, campaign_metrics, total_budget, self._prepare_state(campaign_metrics)))
+            except Exception as e:
+                self.logger.error(f"Error optimizing budgets: {str(e)}")
+                results[idx] = self._fallback_allocation(campaign_metrics, total_budget)
+        
+        # Run the model once over every state it accepts
+        batch, actions = [], None
+        try:
+            if prepared and self._layers is None:
+                self._sync_inference_weights(prepared[0][3].shape[1])
+            model_width = self._layers[0][0].shape[0] if self._layers else None
+            
+            for item in prepared:
+                if item[3].shape[1] == model_width:
+                    batch.append(item)
+                else:
+                    self.logger.error(
+                        f"Error optimizing budgets: state width {item[3].shape[1]} "
+                        f"does not match model input width {model_width}"
+                    )
+                    results[item[0]] = self._fallback_allocation(item[1], item[2])
+            
+            if batch:
+                actions = self._get_model_action(np.vstack([state for _, _, _, state in batch]))
+        except Exception as e:
+            self.logger.error(f"Error optimizing budgets: {str(e)}")
+            for idx, campaign_metrics, total_budget, _ in prepared:
+                if results[idx] is None:
+                    results[idx] = self._fallback_allocation(campaign_metrics, total_budget)
+            return results
+        
+        for row, (idx, campaign_metrics, total_budget, state) in enumerate(batch):
+            action = actions[row:row + 1]
+            try:
+                allocations = self._convert_action_to_allocations(
+                    action,
+                    campaign_metrics,
+                    total_budget
+                )
+                final_allocations = self._apply_constraints(allocations, total_budget)
+                self._update_model(state, action, final_allocations)
+                results[idx] = final_allocations
+            except Exception as e:
+                self.logger.error(f"Error optimizing budgets: {str(e)}")
+                results[idx] = self._fallback_allocation(campaign_metrics, total_budget)
+        
+        return results
+    
     def update_performance(self,
                          campaign_metrics: Dict[str, CampaignMetrics]):
         """Update optimization model with new performance data
@@ -119,18 +362,48 @@ class BudgetOptimizer:
             campaign_metrics: Latest campaign performance metrics
         """
         try:
-            # Prepare training data
-            states, actions, rewards = self._prepare_training_data(campaign_metrics)
+            # Keep feature standardization current with the latest metrics
+            self.scaler.partial_fit(self._state_rows(campaign_metrics))
+            
+            # Prepare training data, None when there is nothing to train on
+            training_data = self._prepare_training_data(campaign_metrics)
             
             # Update RL model
-            self._train_model(states, actions, rewards)
+            if training_data is not None:
+                states, actions, rewards = training_data
+                self._train_model(states, actions, rewards)
+                self._sync_inference_weights()
             
             # Update state history
             self._update_state_history(campaign_metrics)
             
+            # Persist updated weights and scaler for the next start
+            self.save_state()
+            
         except Exception as e:
             self.logger.error(f"Error updating performance data: {str(e)}")
     
+    def save_state(self):
+        """Persist model weights and fitted scaler for warm starts"""
+        state_dir = self.config.get('model_config', {}).get('state_dir')
+        if not state_dir:
+            return
+        
+        try:
+            path = Path(state_dir)
+            path.mkdir(parents=True, exist_ok=True)
+            
+            if self._layers is not None:
+                np.savez(
+                    path / 'budget_model.npz',
+                    *[array for layer in self._layers for array in layer]
+                )
+            if hasattr(self.scaler, 'mean_'):
+                joblib.dump(self.scaler, path / 'budget_scaler.joblib')
+            
+        except Exception as e:
+            self.logger.error(f"Error saving optimizer state: {str(e)}")
+    
     def get_optimization_insights(self,
                                 allocations: Dict[str, BudgetAllocation],
                                 metrics: Dict[str, CampaignMetrics]) -> List[str]:
@@ -168,13 +441,16 @@ class BudgetOptimizer:
         
         return insights
     
-    def _build_rl_model(self) -> keras.Model:
+    def _build_rl_model(self) -> "keras.Model":
         """Build reinforcement learning model architecture
         
         Returns:
             Keras model for RL-based optimization
         """
         try:
+            # Imported here so loading this module does not pull in TensorFlow
+            from tensorflow import keras
+            
             # Define model architecture
             model = keras.Sequential([
                 keras.layers.Dense(64, activation='relu'),
@@ -195,50 +471,117 @@ class BudgetOptimizer:
             self.logger.error(f"Error building RL model: {str(e)}")
             raise
     
-    def _prepare_state(self,
-                      campaign_metrics: Dict[str, CampaignMetrics]) -> np.ndarray:
+    def _load_state(self):
+        """Restore model weights and scaler persisted by save_state"""
+        state_dir = self.config.get('model_config', {}).get('state_dir')
+        if not state_dir:
+            return
+        
+        path = Path(state_dir)
+        try:
+            self.scaler = joblib.load(path / 'budget_scaler.joblib')
+        except FileNotFoundError:
+            pass
+        
+        try:
+            with np.load(path / 'budget_model.npz') as data:
+                weights = [data[f'arr_{i}'] for i in range(len(data.files))]
+        except FileNotFoundError:
+            return
+        
+        # Restore into Keras too so further training starts from these weights
+        self.model.build((None, weights[0].shape[0]))
+        self.model.set_weights(weights)
+        self._sync_inference_weights()
+    
+    def _prepare_state(self, campaign_metrics: Mapping[str, CampaignMetrics]) -> np.ndarray:
         """Prepare state representation for RL model
         
+        Per-campaign features are standardized once the scaler has been
+        fitted by update_performance or restored from saved state.
+        
         Args:
-            campaign_metrics: Current campaign metrics
+            campaign_metrics: Current campaign metrics, as a dictionary or
+                CampaignMetricsStore
             
         Returns:
             NumPy array representing current state
         """
-        state_features = []
+        features = self._state_rows(campaign_metrics)
+        if hasattr(self.scaler, 'mean_'):
+            features = self.scaler.transform(features)
+        return features.reshape(1, -1)
+    
+    def _state_rows(self, campaign_metrics: Mapping[str, CampaignMetrics]) -> np.ndarray:
+        """Build the unscaled (N, 6) per-campaign state feature matrix
         
-        for campaign_id, metrics in campaign_metrics.items():
-            campaign_state = [
-                metrics.spend,
-                metrics.revenue,
-                metrics.roas,
-                metrics.cpa,
-                metrics.conversions,
-                metrics.clicks / metrics.impressions if metrics.impressions > 0 else 0
+        Args:
+            campaign_metrics: Campaign metrics, as a dictionary or
+                CampaignMetricsStore
+            
+        Returns:
+            One feature row per campaign
+        """
+        if isinstance(campaign_metrics, CampaignMetricsStore):
+            columns = [getattr(campaign_metrics, name) for name in _STATE_COLUMNS]
+        else:
+            # Read dictionaries column by column without building a store
+            metrics = list(campaign_metrics.values())
+            columns = [
+                np.fromiter(
+                    (getattr(m, name) for m in metrics),
+                    dtype=CampaignMetricsStore._DTYPES[name],
+                    count=len(metrics)
+                )
+                for name in _STATE_COLUMNS
             ]
-            state_features.extend(campaign_state)
-        
-        return np.array(state_features).reshape(1, -1)
+        return _state_features(*columns)
     
     def _get_model_action(self, state: np.ndarray) -> np.ndarray:
         """Get budget allocation action from RL model
         
         Args:
-            state: Current state representation
+            state: Current state representation, or a (K, F) stack of states
             
         Returns:
-            NumPy array of action values
+            NumPy array of action values, one row per state
         """
         # Add exploration noise during training
         if self.config.get('training_mode', False):
             noise = np.random.normal(0, 0.1, size=state.shape)
             state = state + noise
         
-        return self.model.predict(state)
+        if self._layers is None:
+            self._sync_inference_weights(state.shape[1])
+        
+        # Dense ReLU stack followed by the linear output layer
+        x = state.astype(np.float32)
+        for weights, bias in self._layers[:-1]:
+            x = np.maximum(x @ weights + bias, 0)
+        weights, bias = self._layers[-1]
+        return x @ weights + bias
+    
+    def _sync_inference_weights(self, n_features: Optional[int] = None):
+        """Copy RL model weights into NumPy arrays for inference
+        
+        Args:
+            n_features: State width used to build the model if it has not
+                been built yet
+        """
+        if not self.model.built:
+            if n_features is None:
+                return
+            self.model.build((None, n_features))
+        
+        weights = self.model.get_weights()
+        self._layers = [
+            (weights[i].astype(np.float32), weights[i + 1].astype(np.float32))
+            for i in range(0, len(weights), 2)
+        ]
     
     def _convert_action_to_allocations(self,
                                      action: np.ndarray,
-                                     campaign_metrics: Dict[str, CampaignMetrics],
+                                     campaign_metrics: Mapping[str, CampaignMetrics],
                                      total_budget: float) -> Dict[str, BudgetAllocation]:
         """Convert model action to budget allocations
         
@@ -250,9 +593,10 @@ class BudgetOptimizer:
         Returns:
             Dictionary of budget allocations
         """
-        # Normalize action values to proportions
-        action_values = action.flatten()
-        proportions = tf.nn.softmax(action_values).numpy()
+        # Normalize action values to proportions (numerically stable softmax)
+        action_values = action.ravel().astype(np.float64)
+        exp_values = np.exp(action_values - action_values.max())
+        proportions = exp_values / exp_values.sum()
         
         allocations = {}
         for (campaign_id, metrics), proportion in zip(campaign_metrics.items(), proportions):
@@ -285,20 +629,20 @@ class BudgetOptimizer:
             Adjusted budget allocations
         """
         min_budget = self.config['min_campaign_budget']
+        campaign_ids = list(allocations)
+        budgets = np.fromiter(
+            (a.optimized_budget for a in allocations.values()),
+            dtype=np.float64,
+            count=len(campaign_ids)
+        )
         
-        # Ensure minimum budgets
-        for allocation in allocations.values():
-            if allocation.optimized_budget < min_budget:
-                allocation.optimized_budget = min_budget
+        # Ensure minimum budgets and normalize to total budget
+        _constrain_budgets(budgets, float(min_budget), float(total_budget))
         
-        # Normalize to total budget
-        total_allocated = sum(a.optimized_budget for a in allocations.values())
-        if total_allocated > total_budget:
-            scale_factor = total_budget / total_allocated
-            for allocation in allocations.values():
-                allocation.optimized_budget *= scale_factor
-        
-        return allocations
+        return {
+            campaign_id: replace(allocations[campaign_id], optimized_budget=float(budget))
+            for campaign_id, budget in zip(campaign_ids, budgets)
+        }
     
     def _predict_roas(self, campaign_id: str, budget: float) -> float:
         """Predict ROAS for a given budget allocation"""
@@ -7,12 +7,18 @@ and machine learning to identify and adjust underperforming elements.
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
 from datetime import datetime
+from pathlib import Path
 import numpy as np
 from PIL import Image
 import io
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.ensemble import RandomForestClassifier
-from transformers import pipeline
 
 @dataclass
 class CreativeElement:
@@ -34,6 +40,32 @@ class CreativeOptimization:
     confidence: float
     recommendations: List[str]
 
+# Predicted metric changes, in ElementTable.impacts column order
+_IMPACT_METRICS = ('ctr_change', 'engagement_change', 'conversion_change')
+
+@dataclass
+class ElementTable:
+    """Columnar view of an ad's creative elements for aggregation"""
+    ids: np.ndarray  # object array of element IDs
+    types: np.ndarray  # object array of element types
+    impacts: np.ndarray  # float32, shape (N, len(_IMPACT_METRICS))
+    
+    @classmethod
+    def from_elements(cls, elements: Dict[str, CreativeElement]) -> 'ElementTable':
+        """Convert an element dictionary into a table with zeroed impacts"""
+        return cls(
+            ids=np.array(list(elements), dtype=object),
+            types=np.array(
+                [getattr(element, 'element_type', None) for element in elements.values()],
+                dtype=object
+            ),
+            impacts=np.zeros((len(elements), len(_IMPACT_METRICS)), dtype=np.float32)
+        )
+    
+    def total_impact(self) -> Dict[str, float]:
+        """Sum impacts over all elements"""
+        return dict(zip(_IMPACT_METRICS, self.impacts.sum(axis=0).tolist()))
+
 class CreativeOptimizer:
     """Handles real-time optimization of ad creative elements"""
     
@@ -60,11 +92,9 @@ class CreativeOptimizer:
                 random_state=42
             )
             
-            # Setup text analysis pipeline
-            self.text_analyzer = pipeline(
-                "text-classification",
-                model=self.config['model_config']['text_model']
-            )
+            # Text classification model, loaded on first use
+            self._text_analyzer = None
+            self._text_analyzer_lock = threading.Lock()
             
             # Initialize performance history
             self.performance_history = {}
@@ -73,16 +103,142 @@ class CreativeOptimizer:
             self.logger.error(f"Error setting up models: {str(e)}")
             raise
     
+    def _get_text_analyzer(self) -> Tuple[any, any]:
+        """Return the (tokenizer, model) pair, building it on first use"""
+        if self._text_analyzer is None:
+            with self._text_analyzer_lock:
+                if self._text_analyzer is None:
+                    self._text_analyzer = self._build_text_analyzer()
+        return self._text_analyzer
+    
+    def _build_text_analyzer(self) -> Tuple[any, any]:
+        """Load the text classification tokenizer and model
+        
+        Uses an INT8 dynamically quantized ONNX Runtime model when Optimum is
+        installed, falling back to the PyTorch model otherwise. The quantized
+        model is cached on disk under model_config['onnx_cache_dir'] so it is
+        only exported once. Exports are built in a temporary directory and
+        moved into place, so concurrent workers never load a partial cache.
+        
+        Returns:
+            Tuple of (tokenizer, model)
+        """
+        # Imported here so loading this module does not pull in PyTorch
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        
+        model_name = self.config['model_config']['text_model']
+        
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError:
+            self.logger.info("Optimum not installed, using PyTorch text model")
+            torch.set_num_threads(os.cpu_count())
+            model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+            if self.config['model_config'].get('compile_text_model', False):
+                model = torch.compile(model, mode='reduce-overhead')
+            return AutoTokenizer.from_pretrained(model_name), model
+        
+        cache_root = Path(self.config['model_config'].get('onnx_cache_dir', '.onnx_cache'))
+        quantized_dir = cache_root / model_name.replace('/', '--')
+        
+        if not quantized_dir.exists():
+            cache_root.mkdir(parents=True, exist_ok=True)
+            staging_dir = Path(tempfile.mkdtemp(prefix=quantized_dir.name + '.', dir=cache_root))
+            try:
+                export_dir = staging_dir / 'fp32'
+                build_dir = staging_dir / 'quantized'
+                ORTModelForSequenceClassification.from_pretrained(
+                    model_name,
+                    export=True
+                ).save_pretrained(export_dir)
+                
+                quantizer = ORTQuantizer.from_pretrained(export_dir)
+                quantizer.quantize(
+                    save_dir=build_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(
+                        is_static=False,
+                        per_channel=False
+                    )
+                )
+                AutoTokenizer.from_pretrained(model_name).save_pretrained(build_dir)
+                
+                try:
+                    os.replace(build_dir, quantized_dir)
+                except OSError:
+                    # Another worker moved its export into place first
+                    if not quantized_dir.exists():
+                        raise
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session_options.intra_op_num_threads = self.config['model_config'].get(
+            'onnx_threads',
+            os.cpu_count()
+        )
+        
+        model = ORTModelForSequenceClassification.from_pretrained(
+            quantized_dir,
+            file_name='model_quantized.onnx',
+            session_options=session_options
+        )
+        tokenizer = AutoTokenizer.from_pretrained(quantized_dir)
+        
+        return tokenizer, model
+    
+    def _classify_texts(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Classify texts with direct tokenizer and model calls
+        
+        Args:
+            texts: Texts to classify
+            
+        Returns:
+            One {'label', 'score'} dict per text, like the
+            text-classification pipeline
+        """
+        import torch
+        
+        tokenizer, model = self._get_text_analyzer()
+        batch_size = self.config.get('text_batch_size', 32)
+        id2label = model.config.id2label
+        results = []
+        
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                batch = tokenizer(
+                    texts[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.config['model_config'].get('text_max_length', 64),
+                    return_tensors='pt'
+                )
+                probs = model(**batch).logits.softmax(dim=-1)
+                scores, labels = probs.max(dim=-1)
+                results.extend(
+                    {'label': id2label[label], 'score': score}
+                    for label, score in zip(labels.tolist(), scores.tolist())
+                )
+        
+        return results
+    
     def optimize_creative(self,
                         ad_id: str,
                         elements: Dict[str, CreativeElement],
-                        performance_data: Dict[str, float]) -> CreativeOptimization:
+                        performance_data: Dict[str, float],
+                        text_predictions: Optional[Dict[str, Dict[str, any]]] = None) -> CreativeOptimization:
         """Optimize ad creative elements based on performance
         
         Args:
             ad_id: Unique identifier for the ad
             elements: Dictionary of current creative elements
             performance_data: Current performance metrics
+            text_predictions: Optional precomputed text classifications by
+                element ID, as returned by _predict_texts; the text model is
+                only queried when not provided
             
         Returns:
             CreativeOptimization object with optimization results
@@ -94,12 +250,14 @@ class CreativeOptimizer:
             # Identify underperforming elements
             underperforming = self._identify_underperforming(
                 elements,
-                performance_data
+                performance_data,
+                text_predictions
             )
             
             # Generate optimizations
             optimized_elements = self._generate_optimizations(
                 underperforming,
+                elements,
                 performance_data
             )
             
@@ -139,17 +297,69 @@ class CreativeOptimizer:
             Dictionary mapping ad IDs to optimization results
         """
         optimizations = {}
+        if not ads_data:
+            return optimizations
         
-        for ad_id, (elements, performance) in ads_data.items():
-            try:
-                optimization = self.optimize_creative(ad_id, elements, performance)
-                optimizations[ad_id] = optimization
-            except Exception as e:
-                self.logger.error(f"Error in batch optimization for ad {ad_id}: {str(e)}")
-                continue
+        # Classify the text of every ad in one batched model pass
+        text_predictions = self._batch_text_predictions(ads_data)
+        
+        # Workers share the models, so keep the pool small unless configured
+        workers = min(self.config.get('workers', 4), len(ads_data))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (ad_id, executor.submit(
+                    self.optimize_creative,
+                    ad_id,
+                    elements,
+                    performance,
+                    text_predictions.get(ad_id)
+                ))
+                for ad_id, (elements, performance) in ads_data.items()
+            ]
+            
+            # Collect in submission order so results follow ads_data
+            for ad_id, future in futures:
+                try:
+                    optimizations[ad_id] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error in batch optimization for ad {ad_id}: {str(e)}")
+                    continue
         
         return optimizations
     
+    def _batch_text_predictions(self,
+                              ads_data: Dict[str, Tuple[Dict[str, CreativeElement], Dict[str, float]]]) -> Dict[str, Dict[str, Dict[str, any]]]:
+        """Classify the candidate text elements of many ads in one model pass
+        
+        Args:
+            ads_data: Dictionary mapping ad IDs to tuples of (elements, performance_data)
+            
+        Returns:
+            Dictionary mapping ad IDs to their text predictions by element
+            ID; empty if classification fails, so each ad classifies its
+            own text instead
+        """
+        keys = []
+        texts = []
+        for ad_id, (elements, performance) in ads_data.items():
+            for element_id, text in self._texts_to_classify(elements, performance).items():
+                keys.append((ad_id, element_id))
+                texts.append(text)
+        
+        predictions = {ad_id: {} for ad_id in ads_data}
+        if not texts:
+            return predictions
+        
+        try:
+            results = self._classify_texts(texts)
+        except Exception as e:
+            self.logger.error(f"Error in batch text classification: {str(e)}")
+            return {}
+        
+        for (ad_id, element_id), result in zip(keys, results):
+            predictions[ad_id][element_id] = result
+        return predictions
+    
     def _update_performance_history(self,
                                   ad_id: str,
                                   elements: Dict[str, CreativeElement],
@@ -161,56 +371,120 @@ class CreativeOptimizer:
             elements: Current creative elements
             performance: Current performance metrics
         """
-        if ad_id not in self.performance_history:
-            self.performance_history[ad_id] = []
+        history = self.performance_history.get(ad_id)
+        if history is None:
+            # Bounded deque evicts the oldest entry on append
+            history = deque(maxlen=self.config.get('max_history_size', 1000))
+            self.performance_history[ad_id] = history
         
-        self.performance_history[ad_id].append({
+        history.append({
             'timestamp': datetime.now(),
             'elements': elements,
             'performance': performance
         })
-        
-        # Maintain history size
-        max_history = self.config.get('max_history_size', 1000)
-        if len(self.performance_history[ad_id]) > max_history:
-            self.performance_history[ad_id] = self.performance_history[ad_id][-max_history:]
     
     def _identify_underperforming(self,
                                 elements: Dict[str, CreativeElement],
-                                performance: Dict[str, float]) -> List[str]:
+                                performance: Dict[str, float],
+                                text_predictions: Optional[Dict[str, Dict[str, any]]] = None) -> List[str]:
         """Identify underperforming creative elements
         
+        Text elements are also flagged individually when the text model
+        assigns them one of model_config['flagged_text_labels'].
+        
         Args:
             elements: Current creative elements
             performance: Current performance metrics
+            text_predictions: Optional precomputed text classifications by
+                element ID
             
         Returns:
             List of underperforming element IDs
         """
-        underperforming = []
         thresholds = self.config['performance_thresholds']
         
-        for element_id, element in elements.items():
-            # Check against thresholds
-            if element.element_type == 'image':
-                if performance.get('ctr', 0) < thresholds['min_ctr']:
-                    underperforming.append(element_id)
-            elif element.element_type == 'text':
-                if performance.get('engagement_rate', 0) < thresholds['min_engagement']:
-                    underperforming.append(element_id)
-            elif element.element_type == 'cta':
-                if performance.get('conversion_rate', 0) < thresholds['min_cvr']:
-                    underperforming.append(element_id)
-        
-        return underperforming
+        # Performance is shared by all elements, so each threshold check
+        # selects or rejects every element of its type at once
+        flagged_types = set()
+        if performance.get('ctr', 0) < thresholds['min_ctr']:
+            flagged_types.add('image')
+        if performance.get('engagement_rate', 0) < thresholds['min_engagement']:
+            flagged_types.add('text')
+        if performance.get('conversion_rate', 0) < thresholds['min_cvr']:
+            flagged_types.add('cta')
+        
+        # Text that passes the engagement check is judged by the text model
+        if text_predictions is None:
+            text_predictions = self._predict_texts(elements, performance)
+        flagged_labels = set(self.config['model_config'].get('flagged_text_labels', ['NEGATIVE']))
+        min_score = thresholds.get('text_flag_score', 0.5)
+        flagged_texts = {
+            element_id for element_id, prediction in text_predictions.items()
+            if prediction['label'] in flagged_labels and prediction['score'] >= min_score
+        }
+        
+        if not flagged_types and not flagged_texts:
+            return []
+        
+        return [
+            element_id for element_id, element in elements.items()
+            if element.element_type in flagged_types or element_id in flagged_texts
+        ]
+    
+    def _texts_to_classify(self,
+                         elements: Dict[str, CreativeElement],
+                         performance: Dict[str, float]) -> Dict[str, str]:
+        """Select the text elements whose classification decides flagging
+        
+        Low engagement already flags every text element, so nothing needs
+        classifying then.
+        
+        Args:
+            elements: Current creative elements
+            performance: Current performance metrics
+            
+        Returns:
+            Dictionary mapping element IDs to their text
+        """
+        texts = {
+            element_id: element.content
+            for element_id, element in elements.items()
+            if element.element_type == 'text' and isinstance(element.content, str)
+        }
+        if not texts:
+            return texts
+        
+        min_engagement = self.config['performance_thresholds']['min_engagement']
+        if performance.get('engagement_rate', 0) < min_engagement:
+            return {}
+        return texts
+    
+    def _predict_texts(self,
+                     elements: Dict[str, CreativeElement],
+                     performance: Dict[str, float]) -> Dict[str, Dict[str, any]]:
+        """Classify the candidate text elements of a single ad
+        
+        Args:
+            elements: Current creative elements
+            performance: Current performance metrics
+            
+        Returns:
+            Dictionary mapping element IDs to {'label', 'score'} predictions
+        """
+        texts = self._texts_to_classify(elements, performance)
+        if not texts:
+            return {}
+        return dict(zip(texts, self._classify_texts(list(texts.values()))))
     
     def _generate_optimizations(self,
                               underperforming: List[str],
+                              elements: Dict[str, CreativeElement],
                               performance: Dict[str, float]) -> Dict[str, CreativeElement]:
         """Generate optimized versions of underperforming elements
         
         Args:
             underperforming: List of underperforming element IDs
+            elements: Current creative elements
             performance: Current performance metrics
             
         Returns:
@@ -220,6 +494,7 @@ class CreativeOptimizer:
         
         for element_id in underperforming:
             try:
+                element = elements[element_id]
                 if element.element_type == 'image':
                     optimized[element_id] = self._optimize_image(element)
                 elif element.element_type == 'text':
@@ -244,28 +519,24 @@ class CreativeOptimizer:
         Returns:
             Dictionary of predicted metric changes
         """
-        impact = {
-            'ctr_change': 0.0,
-            'engagement_change': 0.0,
-            'conversion_change': 0.0
-        }
+        table = ElementTable.from_elements(optimized)
         
         try:
             # Calculate predicted changes for each element
-            for element_id in optimized:
+            for row, element_id in enumerate(table.ids):
                 element_impact = self._predict_element_impact(
                     original[element_id],
                     optimized[element_id]
                 )
-                
-                # Aggregate impacts
-                for metric, change in element_impact.items():
-                    impact[metric] += change
+                table.impacts[row] = [
+                    element_impact.get(metric, 0.0) for metric in _IMPACT_METRICS
+                ]
             
         except Exception as e:
             self.logger.error(f"Error predicting performance impact: {str(e)}")
         
-        return impact
+        # Aggregate impacts in one reduction
+        return table.total_impact()
     
     def _generate_recommendations(self,
                                 underperforming: List[str],
@@ -4,13 +4,22 @@ This module handles real-time scoring of ad performance using various metrics
 and machine learning models to predict future performance.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import logging
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
+import joblib
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+from cachetools import LRUCache
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; fall back to NumPy kernels
+    njit = None
 
 @dataclass
 class AdPerformanceMetrics:
@@ -39,6 +48,156 @@ class AdScore:
     recommendations: List[str]
     timestamp: datetime
 
+# Metric columns used as prediction features, in feature-matrix order
+_FEATURE_FIELDS = (
+    'impressions', 'clicks', 'conversions', 'spend',
+    'ctr', 'cvr', 'cpc', 'roas', 'engagement_rate'
+)
+
+# Targets of the multi-output prediction model, in output order
+_PREDICTED_METRICS = ('ctr', 'cvr', 'cpc', 'roas')
+
+# Component scores, in the column order returned by _score_kernel
+_COMPONENTS = ('engagement', 'conversion', 'efficiency', 'roi')
+
+# Storage dtype of each history column
+_HISTORY_DTYPES = {
+    'impressions': np.int32,
+    'clicks': np.int32,
+    'conversions': np.int32,
+    'spend': np.float32,
+    'ctr': np.float16,
+    'cvr': np.float16,
+    'cpc': np.float32,
+    'roas': np.float32,
+    'engagement_rate': np.float16,
+    'timestamp': np.int64
+}
+
+def _score_kernel_numpy(metrics: np.ndarray,
+                       weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute component scores and weighted current scores for many ads
+    
+    Args:
+        metrics: (N, M) matrix with columns in _FEATURE_FIELDS order
+        weights: Component weights, already divided by the weight sum
+        
+    Returns:
+        Tuple of (N, 4) component scores and (N,) weighted current scores
+    """
+    ctr, cvr, cpc, roas, engagement_rate = (metrics[:, i] for i in range(4, 9))
+    components = np.empty((metrics.shape[0], 4), dtype=metrics.dtype)
+    components[:, 0] = np.clip(ctr * 0.5 + engagement_rate * 0.5, 0.0, 1.0)
+    components[:, 1] = np.clip(cvr, 0.0, 1.0)
+    components[:, 2] = 1.0 / (1.0 + np.maximum(cpc, 0.0))
+    components[:, 3] = np.maximum(roas, 0.0) / (1.0 + np.maximum(roas, 0.0))
+    return components, components @ weights
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_kernel(metrics, weights):
+        """Fused per-ad scoring kernel, see _score_kernel_numpy"""
+        n = metrics.shape[0]
+        components = np.empty((n, 4), dtype=metrics.dtype)
+        current = np.empty(n, dtype=metrics.dtype)
+        for i in prange(n):
+            engagement = metrics[i, 4] * 0.5 + metrics[i, 8] * 0.5
+            components[i, 0] = min(max(engagement, 0.0), 1.0)
+            components[i, 1] = min(max(metrics[i, 5], 0.0), 1.0)
+            components[i, 2] = 1.0 / (1.0 + max(metrics[i, 6], 0.0))
+            roas = max(metrics[i, 7], 0.0)
+            components[i, 3] = roas / (1.0 + roas)
+            current[i] = (
+                components[i, 0] * weights[0] + components[i, 1] * weights[1]
+                + components[i, 2] * weights[2] + components[i, 3] * weights[3]
+            )
+        return components, current
+else:
+    _score_kernel = _score_kernel_numpy
+
+
+class MetricsHistory:
+    """Fixed-capacity ring buffer of ad metrics stored column-wise
+    
+    Each metric is kept in its own preallocated array, so appends overwrite
+    a single slot and feature assembly reads contiguous columns instead of
+    walking AdPerformanceMetrics objects. Rate metrics are kept as float16,
+    which holds small CTRs and CVRs to about three significant digits. The
+    timestamp column holds the wall-clock ingestion time from time.time_ns().
+    """
+    
+    def __init__(self, capacity: int):
+        """Initialize an empty history
+        
+        Args:
+            capacity: Maximum number of entries kept
+        """
+        self.capacity = capacity
+        self.columns = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in _HISTORY_DTYPES.items()
+        }
+        self._n = 0
+        self._head = 0
+    
+    def append(self, metrics: AdPerformanceMetrics, timestamp_ns: Optional[int] = None):
+        """Write metrics into the next slot, evicting the oldest when full
+        
+        Args:
+            metrics: Metrics to store
+            timestamp_ns: Ingestion time from time.time_ns(), read now
+                when not provided
+        """
+        slot = self._head
+        for name in _FEATURE_FIELDS:
+            self.columns[name][slot] = getattr(metrics, name)
+        self.columns['timestamp'][slot] = (
+            time.time_ns() if timestamp_ns is None else timestamp_ns
+        )
+        
+        self._head = (slot + 1) % self.capacity
+        self._n = min(self._n + 1, self.capacity)
+    
+    def column(self, name: str) -> np.ndarray:
+        """Return a metric column in chronological order
+        
+        This is a view of the buffer until it wraps around, and a copy after.
+        """
+        values = self.columns[name]
+        if self._n < self.capacity:
+            values = values[:self._n]
+        else:
+            values = np.concatenate((values[self._head:], values[:self._head]))
+        return values
+    
+    def feature_matrix(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the (n_samples, n_features) prediction feature matrix
+        
+        Args:
+            out: Optional preallocated (capacity, n_features) buffer; when
+                given, features are written into it without allocating and
+                a view of its first n_samples rows is returned
+        """
+        if out is None:
+            return np.column_stack([self.column(name) for name in _FEATURE_FIELDS]).astype(
+                np.float64,
+                copy=False
+            )
+        
+        n = self._n
+        # Oldest entries start at the head once the buffer has wrapped
+        start = self._head if n == self.capacity else 0
+        tail = n - start
+        for j, name in enumerate(_FEATURE_FIELDS):
+            values = self.columns[name]
+            out[:tail, j] = values[start:n]
+            out[tail:n, j] = values[:start]
+        return out[:n]
+    
+    def __len__(self) -> int:
+        return self._n
+
 class AdScorer:
     """Handles real-time scoring of ad performance"""
     
@@ -50,36 +209,149 @@ class AdScorer:
                 - scoring_weights: Weights for different metrics
                 - prediction_window: Time window for predictions
                 - min_data_points: Minimum data points for reliable scoring
-                - model_config: ML model configuration
+                - model_config: ML model configuration (optional scaler_path
+                  to persist the fitted feature scaler)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self._min_data_points = config['min_data_points']
         self._setup_models()
     
     def _setup_models(self):
         """Initialize ML models for performance prediction"""
         try:
             self.scaler = StandardScaler()
+            self._scaler_fitted = False
+            self._scaler_mean = None
+            self._scaler_scale = None
+            self._load_scaler()
+            
             self.model = RandomForestRegressor(
                 n_estimators=self.config['model_config']['n_estimators'],
                 random_state=42
             )
+            self._compiled_model = None
             self.metrics_history = {}
             
+            # Scoring weights are immutable config, aligned with _COMPONENTS
+            weights = self.config['scoring_weights']
+            self._weights_sum = float(sum(weights.values()))
+            self._weights_arr = np.array(
+                [weights.get(component, 1.0) for component in _COMPONENTS],
+                dtype=np.float32
+            )
+            self._normalized_weights = self._weights_arr / np.float32(self._weights_sum)
+            
+            # Reusable feature buffers for the prediction path
+            self._feat_buffer = np.empty(
+                (self.config.get('max_history_size', 1000), len(_FEATURE_FIELDS)),
+                dtype=np.float32
+            )
+            self._batch_buffer = np.empty(
+                (self.config.get('max_batch_ads', 1024), len(_FEATURE_FIELDS)),
+                dtype=np.float32
+            )
+            
+            # Per-instance prediction cache keyed by quantized feature rows
+            self._prediction_cache = LRUCache(
+                maxsize=self.config['model_config'].get('prediction_cache_size', 4096)
+            )
+            
         except Exception as e:
             self.logger.error(f"Error setting up models: {str(e)}")
             raise
     
+    def fit_scaler(self, history_arrays: Optional[List[np.ndarray]] = None):
+        """Fit the feature scaler once on historical feature matrices
+        
+        Args:
+            history_arrays: (n_samples, n_features) matrices to fit on;
+                defaults to every ad's stored metrics history
+        """
+        if history_arrays is None:
+            history_arrays = [
+                history.feature_matrix()
+                for history in self.metrics_history.values()
+                if len(history)
+            ]
+        if not history_arrays:
+            return
+        
+        self.scaler.fit(np.vstack(history_arrays))
+        self._cache_scaler_params()
+        self.clear_prediction_cache()
+        
+        scaler_path = self.config['model_config'].get('scaler_path')
+        if scaler_path:
+            try:
+                Path(scaler_path).parent.mkdir(parents=True, exist_ok=True)
+                joblib.dump(self.scaler, scaler_path)
+            except Exception as e:
+                self.logger.error(f"Error saving scaler: {str(e)}")
+    
+    def compile_model(self, backend: str = 'pytorch', device: Optional[str] = None):
+        """Compile the trained forest into tensor operations with Hummingbird
+        
+        Call after the model is fitted. Prediction then runs as batched
+        tensor ops instead of per-tree traversal, optionally on a GPU.
+        
+        Args:
+            backend: Hummingbird backend ('pytorch', 'torch.jit', 'onnx', 'tvm')
+            device: Optional device for the compiled model, e.g. 'cuda'
+        """
+        try:
+            from hummingbird.ml import convert
+        except ImportError:
+            self.logger.warning("Hummingbird not installed, keeping sklearn inference")
+            return
+        
+        compiled = convert(self.model, backend)
+        if device:
+            compiled.to(device)
+        self._compiled_model = compiled
+    
+    def _predict_rows(self, features: np.ndarray) -> np.ndarray:
+        """Run the compiled model when available, else the sklearn forest"""
+        model = self._compiled_model if self._compiled_model is not None else self.model
+        return np.asarray(model.predict(features))
+    
+    def _load_scaler(self):
+        """Restore a scaler persisted by fit_scaler"""
+        scaler_path = self.config['model_config'].get('scaler_path')
+        if not scaler_path:
+            return
+        try:
+            self.scaler = joblib.load(scaler_path)
+            self._cache_scaler_params()
+        except FileNotFoundError:
+            pass
+    
+    def _cache_scaler_params(self):
+        """Keep the fitted scaler statistics as float32 arrays"""
+        self._scaler_mean = self.scaler.mean_.astype(np.float32)
+        self._scaler_scale = self.scaler.scale_.astype(np.float32)
+        self._scaler_fitted = True
+    
+    def _scale_features(self, features: np.ndarray) -> np.ndarray:
+        """Standardize feature rows in place with the pre-fitted scaler, if any"""
+        if self._scaler_fitted:
+            np.subtract(features, self._scaler_mean, out=features)
+            np.divide(features, self._scaler_scale, out=features)
+        return features
+    
     def score_ad(self,
                  ad_id: str,
                  current_metrics: AdPerformanceMetrics,
-                 historical_data: Optional[List[AdPerformanceMetrics]] = None) -> AdScore:
+                 historical_data: Optional[List[AdPerformanceMetrics]] = None,
+                 predicted_metrics: Optional[Dict[str, float]] = None) -> AdScore:
         """Calculate comprehensive score for an ad
         
         Args:
             ad_id: Unique identifier for the ad
             current_metrics: Current performance metrics
             historical_data: Optional historical performance data
+            predicted_metrics: Optional precomputed predictions; the model
+                is only queried when not provided
             
         Returns:
             AdScore object containing scoring results
@@ -88,43 +360,68 @@ class AdScorer:
             # Update metrics history
             self._update_metrics_history(ad_id, current_metrics)
             
-            # Calculate component scores
-            component_scores = self._calculate_component_scores(current_metrics)
-            
             # Predict future metrics
-            predicted_metrics = self._predict_future_metrics(
-                ad_id,
-                current_metrics,
-                historical_data
-            )
-            
-            # Calculate overall score
-            overall_score = self._calculate_overall_score(
-                component_scores,
-                predicted_metrics
-            )
-            
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                component_scores,
-                predicted_metrics,
-                current_metrics
-            )
+            if predicted_metrics is None:
+                predicted_metrics = self._predict_future_metrics(
+                    ad_id,
+                    current_metrics,
+                    historical_data
+                )
             
-            return AdScore(
-                ad_id=ad_id,
-                overall_score=overall_score,
-                component_scores=component_scores,
-                predicted_metrics=predicted_metrics,
-                confidence=self._calculate_confidence(current_metrics),
-                recommendations=recommendations,
-                timestamp=datetime.now()
-            )
+            return self._build_score(ad_id, current_metrics, predicted_metrics)
             
         except Exception as e:
             self.logger.error(f"Error scoring ad {ad_id}: {str(e)}")
             raise
     
+    def _build_score(self,
+                     ad_id: str,
+                     current_metrics: AdPerformanceMetrics,
+                     predicted_metrics: Dict[str, float],
+                     component_scores: Optional[Dict[str, float]] = None,
+                     current_score: Optional[float] = None,
+                     timestamp: Optional[datetime] = None) -> AdScore:
+        """Assemble the AdScore for an ad whose predictions are known
+        
+        Args:
+            ad_id: Unique identifier for the ad
+            current_metrics: Current performance metrics
+            predicted_metrics: Predicted future metrics
+            component_scores: Optional precomputed component scores
+            current_score: Optional precomputed weighted component score
+            timestamp: Optional scoring time, defaults to now
+            
+        Returns:
+            AdScore object containing scoring results
+        """
+        # Calculate component scores
+        if component_scores is None:
+            component_scores = self._calculate_component_scores(current_metrics)
+        
+        # Calculate overall score
+        overall_score = self._calculate_overall_score(
+            component_scores,
+            predicted_metrics,
+            current_score
+        )
+        
+        # Generate recommendations
+        recommendations = self._generate_recommendations(
+            component_scores,
+            predicted_metrics,
+            current_metrics
+        )
+        
+        return AdScore(
+            ad_id=ad_id,
+            overall_score=overall_score,
+            component_scores=component_scores,
+            predicted_metrics=predicted_metrics,
+            confidence=self._calculate_confidence(current_metrics),
+            recommendations=recommendations,
+            timestamp=datetime.now() if timestamp is None else timestamp
+        )
+    
     def batch_score_ads(self,
                        ads_metrics: List[AdPerformanceMetrics]) -> Dict[str, AdScore]:
         """Score multiple ads in batch
@@ -136,35 +433,93 @@ class AdScorer:
             Dictionary mapping ad IDs to their scores
         """
         scores = {}
+        predictions = {}
+        model_ads = []
+        model_rows = self._batch_rows(len(ads_metrics))
+        timestamp_ns = time.time_ns()
+        timestamp = datetime.fromtimestamp(timestamp_ns / 1e9)
         
+        # Update history and collect one feature row per ad with enough data
         for metrics in ads_metrics:
             try:
-                score = self.score_ad(metrics.ad_id, metrics)
-                scores[metrics.ad_id] = score
+                self._update_metrics_history(metrics.ad_id, metrics, timestamp_ns)
+                history = self.metrics_history[metrics.ad_id]
+                
+                if len(history) < self._min_data_points:
+                    predictions[metrics.ad_id] = self._baseline_predictions(metrics)
+                    continue
+                
+                features = self._prepare_prediction_features(history)
+                features.mean(axis=0, out=model_rows[len(model_ads)])
+                model_ads.append(metrics)
+            except Exception as e:
+                self.logger.error(f"Error preparing features for ad {metrics.ad_id}: {str(e)}")
+                continue
+        
+        # Single model call over all ads missing from the prediction cache
+        if model_ads:
+            try:
+                outputs = self._predict_cached(model_rows[:len(model_ads)])
+                for metrics, row in zip(model_ads, outputs):
+                    predictions[metrics.ad_id] = {
+                        f'predicted_{metric}': float(value)
+                        for metric, value in zip(_PREDICTED_METRICS, row)
+                    }
+            except Exception as e:
+                self.logger.error(f"Error in batch prediction: {str(e)}")
+                for metrics in model_ads:
+                    predictions[metrics.ad_id] = self._baseline_predictions(metrics)
+        
+        # Component and weighted scores for every ad in one kernel call
+        scored_ads = [m for m in ads_metrics if m.ad_id in predictions]
+        if not scored_ads:
+            return scores
+        
+        metrics_matrix = np.array(
+            [[getattr(m, field) for field in _FEATURE_FIELDS] for m in scored_ads],
+            dtype=np.float32
+        )
+        components, current_scores = _score_kernel(metrics_matrix, self._normalized_weights)
+        
+        for idx, metrics in enumerate(scored_ads):
+            try:
+                scores[metrics.ad_id] = self._build_score(
+                    metrics.ad_id,
+                    metrics,
+                    predictions[metrics.ad_id],
+                    dict(zip(_COMPONENTS, components[idx].tolist())),
+                    float(current_scores[idx]),
+                    timestamp
+                )
             except Exception as e:
                 self.logger.error(f"Error scoring ad {metrics.ad_id}: {str(e)}")
                 continue
         
         return scores
     
+    def _batch_rows(self, n_ads: int) -> np.ndarray:
+        """Return the reusable batch feature buffer, grown to fit n_ads rows"""
+        if self._batch_buffer.shape[0] < n_ads:
+            self._batch_buffer = np.empty((n_ads, len(_FEATURE_FIELDS)), dtype=np.float32)
+        return self._batch_buffer
+    
     def _update_metrics_history(self,
                               ad_id: str,
-                              metrics: AdPerformanceMetrics):
+                              metrics: AdPerformanceMetrics,
+                              timestamp_ns: Optional[int] = None):
         """Update stored metrics history for an ad
         
         Args:
             ad_id: Ad identifier
             metrics: Current metrics
+            timestamp_ns: Optional time.time_ns() ingestion time
         """
-        if ad_id not in self.metrics_history:
-            self.metrics_history[ad_id] = []
+        history = self.metrics_history.get(ad_id)
+        if history is None:
+            history = MetricsHistory(self.config.get('max_history_size', 1000))
+            self.metrics_history[ad_id] = history
         
-        self.metrics_history[ad_id].append(metrics)
-        
-        # Maintain history size
-        max_history = self.config.get('max_history_size', 1000)
-        if len(self.metrics_history[ad_id]) > max_history:
-            self.metrics_history[ad_id] = self.metrics_history[ad_id][-max_history:]
+        history.append(metrics, timestamp_ns)
     
     def _calculate_component_scores(self,
                                  metrics: AdPerformanceMetrics) -> Dict[str, float]:
@@ -176,21 +531,12 @@ class AdScorer:
         Returns:
             Dictionary of component scores
         """
-        scores = {}
-        
-        # Engagement score
-        scores['engagement'] = self._calculate_engagement_score(metrics)
-        
-        # Conversion score
-        scores['conversion'] = self._calculate_conversion_score(metrics)
-        
-        # Cost efficiency score
-        scores['efficiency'] = self._calculate_efficiency_score(metrics)
-        
-        # ROI score
-        scores['roi'] = self._calculate_roi_score(metrics)
-        
-        return scores
+        row = np.array(
+            [[getattr(metrics, field) for field in _FEATURE_FIELDS]],
+            dtype=np.float64
+        )
+        components, _ = _score_kernel_numpy(row, np.ones(4, dtype=np.float64))
+        return dict(zip(_COMPONENTS, components[0].tolist()))
     
     def _predict_future_metrics(self,
                               ad_id: str,
@@ -206,13 +552,14 @@ class AdScorer:
         Returns:
             Dictionary of predicted metrics
         """
+        if not historical_data:
+            historical_data = self.metrics_history.get(ad_id)
+        
+        # Cold ads take the baseline path without touching the model
+        if historical_data is None or len(historical_data) < self._min_data_points:
+            return self._baseline_predictions(current_metrics)
+        
         try:
-            if not historical_data:
-                historical_data = self.metrics_history.get(ad_id, [])
-            
-            if len(historical_data) < self.config['min_data_points']:
-                return self._baseline_predictions(current_metrics)
-            
             # Prepare features
             features = self._prepare_prediction_features(historical_data)
             
@@ -233,23 +580,25 @@ class AdScorer:
     
     def _calculate_overall_score(self,
                                component_scores: Dict[str, float],
-                               predicted_metrics: Dict[str, float]) -> float:
+                               predicted_metrics: Dict[str, float],
+                               current_score: Optional[float] = None) -> float:
         """Calculate overall ad score
         
         Args:
             component_scores: Individual component scores
             predicted_metrics: Predicted future metrics
+            current_score: Optional precomputed weighted component score
             
         Returns:
             Float score between 0 and 1
         """
-        weights = self.config['scoring_weights']
-        
         # Calculate current performance score
-        current_score = sum(
-            score * weights.get(component, 1.0)
-            for component, score in component_scores.items()
-        ) / sum(weights.values())
+        if current_score is None:
+            components = np.array(
+                [component_scores[component] for component in _COMPONENTS],
+                dtype=np.float32
+            )
+            current_score = float(np.dot(components, self._weights_arr)) / self._weights_sum
         
         # Calculate predicted performance impact
         prediction_impact = self._calculate_prediction_impact(predicted_metrics)
@@ -310,26 +659,6 @@ class AdScorer:
         else:
             return 0.9
     
-    def _calculate_engagement_score(self, metrics: AdPerformanceMetrics) -> float:
-        """Calculate engagement component score"""
-        # TODO: Implement engagement scoring logic
-        pass
-    
-    def _calculate_conversion_score(self, metrics: AdPerformanceMetrics) -> float:
-        """Calculate conversion component score"""
-        # TODO: Implement conversion scoring logic
-        pass
-    
-    def _calculate_efficiency_score(self, metrics: AdPerformanceMetrics) -> float:
-        """Calculate cost efficiency component score"""
-        # TODO: Implement efficiency scoring logic
-        pass
-    
-    def _calculate_roi_score(self, metrics: AdPerformanceMetrics) -> float:
-        """Calculate ROI component score"""
-        # TODO: Implement ROI scoring logic
-        pass
-    
     def _baseline_predictions(self,
                             current_metrics: AdPerformanceMetrics) -> Dict[str, float]:
         """Generate baseline predictions when insufficient data"""
@@ -337,18 +666,70 @@ class AdScorer:
         pass
     
     def _prepare_prediction_features(self,
-                                   historical_data: List[AdPerformanceMetrics]) -> np.ndarray:
-        """Prepare feature matrix for predictions"""
-        # TODO: Implement feature preparation logic
-        pass
+                                   historical_data: Union[MetricsHistory, List[AdPerformanceMetrics]]) -> np.ndarray:
+        """Prepare feature matrix for predictions
+        
+        Returns:
+            (n_samples, n_features) array with one row per history entry
+        """
+        if isinstance(historical_data, MetricsHistory):
+            return historical_data.feature_matrix(out=self._feat_buffer)
+        return np.array(
+            [[getattr(m, field) for field in _FEATURE_FIELDS] for m in historical_data],
+            dtype=np.float64
+        )
     
     def _predict_metric(self,
                        features: np.ndarray,
                        historical_data: List[AdPerformanceMetrics],
                        metric: str) -> float:
-        """Predict specific metric using ML model"""
-        # TODO: Implement metric prediction logic
-        pass
+        """Predict specific metric using ML model
+        
+        The model input is the mean feature row of the history window.
+        Predictions are cached on the quantized row, so ads with stable
+        features skip the tree traversal entirely.
+        """
+        row = features.mean(axis=0).reshape(1, -1)
+        return self._predict_cached(row)[0][_PREDICTED_METRICS.index(metric)]
+    
+    @staticmethod
+    def _quantize_features(row: np.ndarray) -> Tuple[int, ...]:
+        """Quantize a feature row into a hashable cache key"""
+        return tuple(np.rint(row * 1000).astype(np.int64).tolist())
+    
+    def _predict_cached(self, rows: np.ndarray) -> List[Tuple[float, ...]]:
+        """Predict all targets for unscaled feature rows through the cache
+        
+        Rows are quantized to cache keys and the model sees the quantized
+        values, so single and batch scoring of the same row agree. Cache
+        misses are predicted in one model call.
+        
+        Args:
+            rows: (n, n_features) unscaled mean feature rows
+            
+        Returns:
+            One tuple of predicted targets per row, in _PREDICTED_METRICS order
+        """
+        keys = [self._quantize_features(row) for row in rows]
+        # Keep results locally, large batches may evict their own entries
+        values = {}
+        for key in keys:
+            cached = self._prediction_cache.get(key)
+            if cached is not None:
+                values[key] = cached
+        
+        missing = [key for key in dict.fromkeys(keys) if key not in values]
+        if missing:
+            batch = np.asarray(missing, dtype=np.float32)
+            batch *= np.float32(1e-3)
+            outputs = self._predict_rows(self._scale_features(batch))
+            for key, output in zip(missing, outputs.reshape(len(missing), -1)):
+                values[key] = self._prediction_cache[key] = tuple(output.tolist())
+        return [values[key] for key in keys]
+    
+    def clear_prediction_cache(self):
+        """Drop cached predictions, e.g. after the model is retrained"""
+        self._prediction_cache.clear()
     
     def _calculate_prediction_impact(self,
                                   predicted_metrics: Dict[str, float]) -> float:
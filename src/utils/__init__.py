@@ -0,0 +1,4 @@
+"""Shared Utilities
+
+This module holds small helpers shared across the Conext Ads packages.
+"""
@@ -0,0 +1,10 @@
+"""Python Version Compatibility
+
+Helpers that smooth over differences between supported Python versions.
+"""
+
+import sys
+
+# dataclass() only accepts slots=True on Python 3.10+; use as
+# @dataclass(**DATACLASS_SLOTS)
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
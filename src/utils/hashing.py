@@ -0,0 +1,29 @@
+"""Content Hashing
+
+Stable digests of JSON-like content, shared by the compliance checkers.
+"""
+
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the json module
+    orjson = None
+
+def content_key(obj: any) -> bytes:
+    """Stable digest of JSON-like content for cache keys
+    
+    Keys are sorted, so semantically identical dicts map to the same key
+    regardless of insertion order or PYTHONHASHSEED. Digests from the orjson
+    and json encoders differ, so keys are only stable within one process.
+    """
+    if orjson is not None:
+        data = orjson.dumps(
+            obj,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS,
+            default=str
+        )
+    else:
+        data = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=16).digest()
@@ -1,8 +1,9 @@
 """Unit tests for ContentModerator module"""
 
 import pytest
+import threading
 from unittest.mock import Mock, patch
-from src.compliance.moderator import ContentModerator, ModerationResult
+from src.compliance.moderator import ContentModerator, ModerationResult, _cache_key, _sniff_image_format
 
 @pytest.fixture
 def content_moderator():
@@ -94,7 +95,7 @@ def test_moderate_ad(content_moderator, mock_models):
     assert result.status == 'rejected'
     assert len(result.violations) == 2
 
-@patch('src.compliance.moderator.requests.get')
+@patch('src.compliance.moderator.requests.Session.get')
 def test_landing_page_check(mock_get, content_moderator):
     """Test landing page checking"""
     mock_get.return_value.status_code = 200
@@ -121,7 +122,7 @@ def test_cache(content_moderator, mock_models):
     result2 = content_moderator.moderate_text(text)
     
     assert result1 == result2
-    assert content_moderator.cache.get(hash(text)) is not None
+    assert content_moderator.cache.get(_cache_key(text.encode())) is not None
 
 def test_batch_moderation(content_moderator, mock_models):
     """Test batch moderation"""
@@ -153,4 +154,146 @@ def test_error_handling(content_moderator):
     # Test with missing models
     content_moderator.models = {}
     with pytest.raises(RuntimeError):
-        content_moderator.moderate_text("test")
\ No newline at end of file
+        content_moderator.moderate_text("test")
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+
+@pytest.fixture
+def stub_moderator():
+    """ContentModerator whose model calls are replaced by stubs"""
+    config = {
+        'toxicity_threshold': 0.5,
+        'sentiment_threshold': 0.3,
+        'forbidden_categories': ['gambling'],
+        'nsfw_threshold': 0.5,
+        'forbidden_objects': []
+    }
+    with patch.object(ContentModerator, '_init_models'):
+        moderator = ContentModerator(config)
+    
+    moderator.text_threads = []
+    
+    def analyze_texts(texts):
+        moderator.text_threads.append(threading.get_ident())
+        return [
+            (
+                {'score': 0.9 if 'bad' in text else 0.1, 'confidence': 0.9},
+                {'score': 0.8, 'confidence': 0.8},
+                []
+            )
+            for text in texts
+        ]
+    
+    def analyze_images(images):
+        return [(0.1, [], 'bad overlay' if b'overlay' in image else '') for image in images]
+    
+    moderator._analyze_texts = analyze_texts
+    moderator._analyze_images = analyze_images
+    return moderator
+
+def test_batch_moderation_results_aligned(stub_moderator):
+    """Test batch results map back to their ads and fields"""
+    ads = [
+        {'id': 'ad1', 'title': 'Great offer', 'images': [{'data': PNG_BYTES}]},
+        {'id': 'ad2', 'title': 'bad words', 'description': 'Fine text'}
+    ]
+    
+    results = stub_moderator.moderate_batch(ads)
+    
+    assert set(results[0]) == {'title', 'image_0'}
+    assert set(results[1]) == {'title', 'description'}
+    assert results[0]['title'].is_approved
+    assert results[0]['image_0'].is_approved
+    assert not results[1]['title'].is_approved
+    assert results[1]['description'].content_id == 'ad2_description'
+
+def test_batch_moderation_image_text_on_caller_thread(stub_moderator):
+    """Test text models, including for image text, only run on the caller's thread"""
+    ads = [{'id': 'ad1', 'title': 'Great offer', 'images': [{'data': PNG_BYTES + b'overlay'}]}]
+    
+    results = stub_moderator.moderate_batch(ads)
+    
+    assert not results[0]['image_0'].is_approved
+    assert results[0]['image_0'].details['text_results'] is not None
+    assert set(stub_moderator.text_threads) == {threading.get_ident()}
+
+def test_moderate_ad_matches_batch(stub_moderator):
+    """Test moderate_ad returns the single-ad batch result"""
+    ad = {'id': 'ad1', 'title': 'Great offer', 'cta': 'bad click'}
+    
+    result = stub_moderator.moderate_ad(ad)
+    
+    assert result['title'].is_approved
+    assert not result['cta'].is_approved
+
+def test_batch_landing_pages(stub_moderator):
+    """Test landing pages are checked through the pooled session"""
+    ads = [
+        {'id': 'ad1', 'landing_page': 'https://ok.test'},
+        {'id': 'ad2', 'landing_page': 'https://gone.test'}
+    ]
+    
+    def fake_get(url, **kwargs):
+        return Mock(status_code=200 if 'ok' in url else 404)
+    
+    with patch.object(stub_moderator._session, 'get', side_effect=fake_get):
+        results = stub_moderator.moderate_batch(ads)
+    
+    assert results[0]['landing_page'].is_approved
+    assert not results[1]['landing_page'].is_approved
+    assert results[1]['landing_page'].details['status_code'] == 404
+
+def test_analysis_cache_reused(stub_moderator):
+    """Test repeated texts are analyzed once"""
+    stub_moderator.moderate_batch([{'id': 'ad1', 'title': 'Great offer'}])
+    stub_moderator.moderate_batch([{'id': 'ad2', 'title': 'Great offer'}])
+    
+    assert len(stub_moderator.text_threads) == 1
+    assert _cache_key(b'Great offer') in stub_moderator.cache
+
+@pytest.mark.parametrize('data, image_format', [
+    (b'\xff\xd8\xff\xe0' + b'\x00' * 8, 'jpeg'),
+    (PNG_BYTES, 'png'),
+    (b'GIF89a' + b'\x00' * 6, 'gif'),
+    (b'BM' + b'\x00' * 10, 'bmp'),
+    (b'RIFF\x00\x00\x00\x00WEBPVP8 ', 'webp'),
+    (bytearray(PNG_BYTES), 'png')
+])
+def test_sniff_image_format(data, image_format):
+    """Test image formats are identified from their magic bytes"""
+    assert _sniff_image_format(data) == image_format
+
+@pytest.mark.parametrize('data', [b'<html></html>', b'%PDF-1.7', b'', b'RIFF\x00\x00\x00\x00WAVE', 'not bytes'])
+def test_sniff_rejects_non_images(data):
+    """Test non-image payloads are rejected"""
+    with pytest.raises(ValueError):
+        _sniff_image_format(data)
+
+def test_non_image_rejected_before_analysis(stub_moderator):
+    """Test non-image payloads never reach the image models"""
+    stub_moderator._analyze_images = Mock()
+    
+    with pytest.raises(ValueError):
+        stub_moderator.moderate_image(b'<html></html>', 'ad1_image_0')
+    
+    stub_moderator._analyze_images.assert_not_called()
+
+def test_moderate_ad_reuses_executor(stub_moderator):
+    """Test single-ad moderation runs on the moderator's executor"""
+    ad = {'id': 'ad1', 'title': 'Great offer', 'landing_page': 'https://ok.test'}
+    
+    with patch('src.compliance.moderator.ThreadPoolExecutor') as executor_cls, \
+         patch.object(stub_moderator._session, 'get', return_value=Mock(status_code=200)):
+        stub_moderator.moderate_ad(ad)
+        stub_moderator.moderate_ad(ad)
+    
+    executor_cls.assert_not_called()
+
+def test_close_releases_executor_and_session(stub_moderator):
+    """Test close shuts down the executor together with the session"""
+    with patch.object(stub_moderator._session, 'close') as close_session:
+        stub_moderator.close()
+    
+    close_session.assert_called_once()
+    with pytest.raises(RuntimeError):
+        stub_moderator._executor.submit(lambda: None)
@@ -1,9 +1,10 @@
 """Unit tests for RegulatoryMonitor module"""
 
+import json
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
-from src.compliance.monitor import RegulatoryMonitor, Regulation, ComplianceCheck
+from src.compliance.monitor import RegulatoryMonitor, Regulation, ComplianceCheck, _content_key
 
 @pytest.fixture
 def regulatory_monitor():
@@ -184,7 +185,7 @@ def test_cache(regulatory_monitor, sample_regulations):
     result2 = regulatory_monitor.check_content(content)
     
     assert result1 == result2
-    assert regulatory_monitor.cache.get(hash(str(content))) is not None
+    assert regulatory_monitor.cache.get((_content_key(content), "reg1")) is not None
 
 def test_requirement_validation(regulatory_monitor, sample_regulations):
     """Test requirement validation"""
@@ -226,4 +227,153 @@ def test_region_matching(regulatory_monitor, sample_regulations):
     assert regulatory_monitor._get_applicable_regulations('US-CA')
     
     # Test no match
-    assert not regulatory_monitor._get_applicable_regulations('INVALID')
\ No newline at end of file
+    assert not regulatory_monitor._get_applicable_regulations('INVALID')
+
+@pytest.fixture
+def isolated_monitor(tmp_path):
+    """RegulatoryMonitor with no regulation files and no update thread"""
+    config = {
+        'regulations_path': str(tmp_path),
+        'update_interval': 24,
+        'api_url': 'https://api.regulations.test',
+        'api_key': 'test_key'
+    }
+    with patch.object(RegulatoryMonitor, '_start_scheduler'):
+        yield RegulatoryMonitor(config)
+
+def make_regulation(reg_id, region, requirements, industry='all'):
+    """Build an active regulation that is already in effect"""
+    return Regulation(
+        id=reg_id,
+        region=region,
+        industry=industry,
+        description=f"Regulation {reg_id}",
+        requirements=requirements,
+        effective_date=datetime.now() - timedelta(days=1)
+    )
+
+def test_dict_requirements_enforced(isolated_monitor):
+    """Test category requirements are enforced by check_compliance"""
+    isolated_monitor.add_regulation(make_regulation(
+        'gdpr', 'EU', {'data_collection': ['consent', 'purpose']}
+    ))
+    
+    content = {
+        'id': 'ad1',
+        'data_collection': {'consent': False, 'purpose': 'Marketing'}
+    }
+    [check] = isolated_monitor.check_compliance(content, 'EU', 'all')
+    assert not check.is_compliant
+    assert check.missing_requirements == ['data_collection.consent']
+    
+    content = {
+        'id': 'ad2',
+        'data_collection': {'consent': True, 'purpose': 'Marketing'}
+    }
+    [check] = isolated_monitor.check_compliance(content, 'EU', 'all')
+    assert check.is_compliant
+    assert not check.missing_requirements
+
+def test_dict_requirements_missing_category(isolated_monitor):
+    """Test content without a required category fails"""
+    isolated_monitor.add_regulation(make_regulation(
+        'gdpr', 'EU', {'data_storage': ['encryption']}
+    ))
+    
+    [check] = isolated_monitor.check_compliance({'id': 'ad1', 'data_storage': 'none'}, 'EU', 'all')
+    assert not check.is_compliant
+    assert check.missing_requirements == ['data_storage.encryption']
+
+def applicable_ids(monitor, region, industry='all'):
+    """IDs of regulations applicable to a region"""
+    return {reg.id for reg in monitor._get_applicable_regulations(region, industry)}
+
+def test_region_index_lookup(isolated_monitor):
+    """Test regions match themselves, parent regions and Global"""
+    for reg in [
+        make_regulation('us', 'US', ['text:required']),
+        make_regulation('us_ca', 'US-CA', ['text:required']),
+        make_regulation('eu', 'EU', ['text:required']),
+        make_regulation('global', 'Global', ['text:required']),
+        make_regulation('finance', 'US', ['text:required'], industry='finance')
+    ]:
+        isolated_monitor.add_regulation(reg)
+    
+    assert applicable_ids(isolated_monitor, 'US-CA') == {'us', 'us_ca', 'global'}
+    assert applicable_ids(isolated_monitor, 'US') == {'us', 'global'}
+    assert applicable_ids(isolated_monitor, 'EU') == {'eu', 'global'}
+    assert applicable_ids(isolated_monitor, 'INVALID') == {'global'}
+    assert applicable_ids(isolated_monitor, 'US', 'finance') == {'finance'}
+
+def test_region_index_follows_updates(isolated_monitor):
+    """Test region changes and replaced regulation dicts are reindexed"""
+    isolated_monitor.add_regulation(make_regulation('reg', 'US', ['text:required']))
+    assert applicable_ids(isolated_monitor, 'US') == {'reg'}
+    
+    isolated_monitor.update_regulation('reg', {'region': 'EU'})
+    assert applicable_ids(isolated_monitor, 'US') == set()
+    assert applicable_ids(isolated_monitor, 'EU') == {'reg'}
+    
+    isolated_monitor.regulations = {'other': make_regulation('other', 'US', ['text:required'])}
+    assert applicable_ids(isolated_monitor, 'US') == {'other'}
+    assert applicable_ids(isolated_monitor, 'EU') == set()
+
+def feed_response(status_code, content=b'', headers=None):
+    """Mock regulatory API response"""
+    response = Mock(status_code=status_code, content=content, headers=headers or {})
+    response.raise_for_status = Mock()
+    return response
+
+def test_regulation_feed_conditional_requests(isolated_monitor):
+    """Test updates send the last ETag and Last-Modified and skip 304 responses"""
+    feed = json.dumps([{
+        'id': 'gdpr',
+        'region': 'EU',
+        'industry': 'all',
+        'description': 'GDPR',
+        'requirements': ['text:required'],
+        'effective_date': (datetime.now() - timedelta(days=1)).isoformat()
+    }]).encode()
+    version = {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    
+    with patch('src.compliance.monitor.requests.get') as get:
+        get.side_effect = [feed_response(200, feed, version), feed_response(304)]
+        isolated_monitor._update_regulations()
+        isolated_monitor._update_regulations()
+    
+    first_headers = get.call_args_list[0].kwargs['headers']
+    second_headers = get.call_args_list[1].kwargs['headers']
+    assert 'If-None-Match' not in first_headers
+    assert second_headers['If-None-Match'] == '"v1"'
+    assert second_headers['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+    assert applicable_ids(isolated_monitor, 'EU') == {'gdpr'}
+
+def test_regulation_feed_version_kept_on_failure(isolated_monitor):
+    """Test a feed that fails to apply does not advance the stored version"""
+    with patch('src.compliance.monitor.requests.get') as get:
+        get.return_value = feed_response(200, b'not json', {'ETag': '"v2"'})
+        with pytest.raises(Exception):
+            isolated_monitor._update_regulations()
+    
+    assert isolated_monitor._feed_etag is None
+
+def test_regulation_feed_parsed_without_orjson(isolated_monitor):
+    """Test the feed and cache keys fall back to the json module without orjson"""
+    feed = json.dumps([{
+        'id': 'gdpr',
+        'region': 'EU',
+        'industry': 'all',
+        'description': 'GDPR',
+        'requirements': ['text:required'],
+        'effective_date': (datetime.now() - timedelta(days=1)).isoformat()
+    }]).encode()
+    
+    with patch('src.compliance.monitor.orjson', None), \
+         patch('src.utils.hashing.orjson', None), \
+         patch('src.compliance.monitor.requests.get') as get:
+        get.return_value = feed_response(200, feed)
+        isolated_monitor._update_regulations()
+        
+        assert _content_key({'a': 1, 'b': 2}) == _content_key({'b': 2, 'a': 1})
+    
+    assert applicable_ids(isolated_monitor, 'EU') == {'gdpr'}
@@ -2,7 +2,7 @@
 
 import pytest
 from datetime import datetime
-from src.compliance.policy import PolicyChecker, PolicyRule, PolicyViolation
+from src.compliance.policy import PolicyChecker, PolicyRule, PolicyViolation, _content_key
 
 @pytest.fixture
 def policy_checker():
@@ -162,4 +162,4 @@ def test_cache(policy_checker, sample_rules):
     result2 = policy_checker.check_content(content)
     
     assert result1 == result2
-    assert policy_checker.cache.get(hash(str(content))) is not None
\ No newline at end of file
+    assert policy_checker.cache.get(_content_key(content)) is not None
\ No newline at end of file
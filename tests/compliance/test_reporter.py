@@ -1,5 +1,7 @@
 """Unit tests for ComplianceReporter module"""
 
+import smtplib
+import threading
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
@@ -215,4 +217,224 @@ def test_error_handling(compliance_reporter):
         compliance_reporter.send_report(
             Mock(spec=ComplianceReport),
             ['test@example.com']
-        )
\ No newline at end of file
+        )
+
+@pytest.fixture
+def configured_reporter(tmp_path, monkeypatch):
+    """ComplianceReporter with real templates, writing into a temp directory"""
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'full_report.html').write_text(
+        "{{ report.id }}|{{ report.summary.total_alerts }}|{{ report.charts|length }}"
+    )
+    (templates / 'alert_email.html').write_text("{{ alert.title }}")
+    (templates / 'report_email.html').write_text("{{ report.id }}")
+    monkeypatch.chdir(tmp_path)
+    
+    config = {
+        'templates_path': str(templates),
+        'smtp_config': {
+            'host': 'smtp.test.com',
+            'port': 465,
+            'username': 'test@test.com',
+            'password': 'test_pass',
+            'sender': 'reporter@test.com'
+        },
+        'alert_thresholds': {
+            'high': 0.8,
+            'medium': 0.5
+        },
+        'alert_recipients': ['admin@test.com'],
+        'baseline_volume': 100
+    }
+    return ComplianceReporter(config)
+
+def test_report_export_is_synchronous(configured_reporter, sample_alerts, tmp_path):
+    """Test the report file exists once generate_report returns"""
+    (tmp_path / 'reports').mkdir()
+    configured_reporter.alerts = sample_alerts
+    
+    report = configured_reporter.generate_report(
+        datetime.now() - timedelta(days=1),
+        datetime.now()
+    )
+    
+    exported = (tmp_path / 'reports' / f"{report.id}.html").read_text()
+    assert exported == f"{report.id}|2|2"
+
+def test_report_export_failure_propagates(configured_reporter, sample_alerts):
+    """Test export errors are raised from generate_report"""
+    configured_reporter.alerts = sample_alerts
+    
+    # No reports directory to write into
+    with pytest.raises(FileNotFoundError):
+        configured_reporter.generate_report(
+            datetime.now() - timedelta(days=1),
+            datetime.now()
+        )
+
+def test_alert_ids_unique_within_second(configured_reporter):
+    """Test alerts created back to back get distinct IDs and resolve separately"""
+    violations = [
+        {
+            'title': f'Violation {i}',
+            'description': 'Low impact violation',
+            'content_id': f'content{i}',
+            'type': 'policy',
+            'impact_score': 0.1
+        }
+        for i in range(3)
+    ]
+    configured_reporter.create_alert(violations)
+    
+    ids = [alert.id for alert in configured_reporter.alerts]
+    assert len(set(ids)) == 3
+    
+    configured_reporter.resolve_alert(ids[1], "Fixed")
+    assert [alert.is_resolved for alert in configured_reporter.alerts] == [False, True, False]
+
+def test_charts_render_in_background(configured_reporter, sample_alerts, tmp_path):
+    """Test charts render on the chart pool and resolve on access"""
+    (tmp_path / 'reports').mkdir()
+    configured_reporter.alerts = sample_alerts
+    render_threads = []
+    
+    def render(values):
+        render_threads.append(threading.get_ident())
+        return "<div>chart</div>"
+    
+    with patch('src.compliance.reporter._render_severity_chart', side_effect=render), \
+         patch('src.compliance.reporter._render_trend_chart', side_effect=render):
+        report = configured_reporter.generate_report(
+            datetime.now() - timedelta(days=1),
+            datetime.now()
+        )
+        
+        assert set(report.charts) == {'severity_distribution', 'alert_trend'}
+        assert dict(report.charts) == {
+            'severity_distribution': "<div>chart</div>",
+            'alert_trend': "<div>chart</div>"
+        }
+    
+    assert len(render_threads) == 2
+    assert threading.get_ident() not in render_threads
+
+def test_no_charts_without_alerts(configured_reporter, tmp_path):
+    """Test an empty period renders no charts"""
+    (tmp_path / 'reports').mkdir()
+    
+    with patch('src.compliance.reporter._render_severity_chart') as render:
+        report = configured_reporter.generate_report(
+            datetime.now() - timedelta(days=1),
+            datetime.now()
+        )
+    
+    assert len(report.charts) == 0
+    render.assert_not_called()
+
+def high_violation(i):
+    """High severity violation that triggers an immediate alert email"""
+    return {
+        'title': f'Violation {i}',
+        'description': 'High impact violation',
+        'content_id': f'content{i}',
+        'type': 'policy',
+        'impact_score': 0.9
+    }
+
+@patch('smtplib.SMTP_SSL')
+def test_smtp_pool_reuses_connection(mock_smtp, configured_reporter):
+    """Test pooled alerts share one authenticated connection until close"""
+    configured_reporter.config['smtp_pool'] = True
+    server = mock_smtp.return_value
+    
+    configured_reporter.create_alert([high_violation(i) for i in range(3)])
+    
+    mock_smtp.assert_called_once_with('smtp.test.com', 465)
+    server.login.assert_called_once_with('test@test.com', 'test_pass')
+    assert server.send_message.call_count == 3
+    
+    configured_reporter.close()
+    server.quit.assert_called_once()
+    assert configured_reporter._smtp is None
+
+@patch('smtplib.SMTP_SSL')
+def test_smtp_pool_reconnects_after_disconnect(mock_smtp, configured_reporter):
+    """Test a dropped pooled connection is replaced and the message resent"""
+    configured_reporter.config['smtp_pool'] = True
+    stale, fresh = Mock(), Mock()
+    stale.send_message.side_effect = smtplib.SMTPServerDisconnected()
+    mock_smtp.side_effect = [stale, fresh]
+    
+    configured_reporter.create_alert(high_violation(1))
+    
+    assert mock_smtp.call_count == 2
+    fresh.send_message.assert_called_once()
+    assert configured_reporter._smtp is fresh
+
+@patch('smtplib.SMTP_SSL')
+def test_smtp_without_pool_connects_per_message(mock_smtp, configured_reporter):
+    """Test each message opens its own connection when pooling is off"""
+    configured_reporter.create_alert([high_violation(i) for i in range(2)])
+    
+    assert mock_smtp.call_count == 2
+    assert mock_smtp.return_value.__enter__.return_value.send_message.call_count == 2
+    assert configured_reporter._smtp is None
+
+def test_unknown_severity_counted_as_other(configured_reporter, sample_alerts, tmp_path):
+    """Test severities outside SEVERITY_LEVELS land in the 'other' bucket"""
+    (tmp_path / 'reports').mkdir()
+    critical = ComplianceAlert(
+        id="alert3",
+        severity="critical",
+        title="Escalated violation",
+        description="Escalated by upstream system",
+        content_id="content3",
+        violation_type="policy",
+        details={},
+        timestamp=datetime.now() - timedelta(minutes=30)
+    )
+    configured_reporter.alerts = sample_alerts + [critical]
+    
+    with patch('src.compliance.reporter._render_severity_chart', return_value="") as render, \
+         patch('src.compliance.reporter._render_trend_chart', return_value=""):
+        report = configured_reporter.generate_report(
+            datetime.now() - timedelta(days=1),
+            datetime.now()
+        )
+        dict(report.charts)
+    
+    assert report.summary['total_alerts'] == 3
+    assert report.summary['high_severity'] == 1
+    # low, medium, high, other
+    assert render.call_args[0][0].tolist() == [0, 1, 1, 1]
+
+def test_charts_render_while_metrics_compute(configured_reporter, sample_alerts, tmp_path):
+    """Test chart rendering is already running when metrics are calculated"""
+    (tmp_path / 'reports').mkdir()
+    configured_reporter.alerts = sample_alerts
+    rendering = threading.Event()
+    calculate_metrics = configured_reporter._calculate_metrics
+    
+    def render(values):
+        rendering.set()
+        return "<div>chart</div>"
+    
+    def metrics_after_render_started(columns):
+        assert rendering.wait(timeout=5)
+        return calculate_metrics(columns)
+    
+    with patch('src.compliance.reporter._render_severity_chart', side_effect=render), \
+         patch('src.compliance.reporter._render_trend_chart', side_effect=render), \
+         patch.object(configured_reporter, '_calculate_metrics', side_effect=metrics_after_render_started):
+        configured_reporter.generate_report(
+            datetime.now() - timedelta(days=1),
+            datetime.now()
+        )
+
+def test_close_shuts_down_chart_pool(configured_reporter):
+    """Test close stops the chart rendering pool"""
+    configured_reporter.close()
+    
+    with pytest.raises(RuntimeError):
+        configured_reporter._chart_pool.submit(lambda: None)
@@ -1,7 +1,15 @@
 """Demonstration script for testing the Compliance System"""
 
 import os
+import io
+import sys
 import json
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+try:
+    import orjson
+except ImportError:  # orjson is optional for the demo
+    orjson = None
 from datetime import datetime, timedelta
 from src.compliance.policy import PolicyChecker
 from src.compliance.moderator import ContentModerator
@@ -10,6 +18,9 @@ from src.compliance.reporter import ComplianceReporter
 
 def load_config():
     """Load configuration for all components"""
+    if orjson is not None:
+        with open('config/compliance/config.json', 'rb') as f:
+            return orjson.loads(f.read())
     with open('config/compliance/config.json', 'r') as f:
         return json.load(f)
 
@@ -143,17 +154,40 @@ def demo_compliance_reporter(config):
     print(f"High Severity: {report.summary['high_severity']}")
     print(f"Compliance Rate: {report.summary['compliance_rate']:.2f}%")
 
+DEMOS = (
+    demo_policy_checker,
+    demo_content_moderator,
+    demo_regulatory_monitor,
+    demo_compliance_reporter
+)
+
+def run_captured(demo, config):
+    """Run a demo in a worker process, returning its output"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        demo(config)
+    return buffer.getvalue()
+
 def main():
-    """Main demonstration function"""
+    """Main demonstration function
+    
+    Demos initialize independent components, so they run in parallel
+    worker processes unless --serial is passed.
+    """
     try:
         print("Loading configuration...")
         config = load_config()
         
         # Run demonstrations
-        demo_policy_checker(config)
-        demo_content_moderator(config)
-        demo_regulatory_monitor(config)
-        demo_compliance_reporter(config)
+        if '--serial' in sys.argv[1:]:
+            for demo in DEMOS:
+                demo(config)
+        else:
+            with ProcessPoolExecutor(max_workers=len(DEMOS)) as pool:
+                futures = [pool.submit(run_captured, demo, config) for demo in DEMOS]
+                # Print each demo's output whole, in demo order
+                for future in futures:
+                    print(future.result(), end='')
         
         print("\nDemonstration completed successfully!")
         
@@ -0,0 +1,105 @@
+"""Unit tests for TikTokAdsConnector module"""
+
+import importlib.util
+import sys
+import orjson
+import pytest
+from unittest.mock import Mock, patch
+from pyrate_limiter import BucketFullException, Duration, Limiter, Rate
+import src.integrations
+
+# PlatformConnector is defined in the package itself; alias the module the
+# connectors import it from when it is not present
+if importlib.util.find_spec('src.integrations.base') is None:
+    sys.modules['src.integrations.base'] = src.integrations
+
+from src.integrations.tiktok import TikTokAdsConnector, _SIMDJSON_MIN_BYTES
+
+@pytest.fixture
+def connector():
+    """TikTokAdsConnector with test credentials"""
+    return TikTokAdsConnector({
+        'access_token': 'test_token',
+        'advertiser_id': 'adv_1',
+        'app_id': 'app_1',
+        'secret': 'secret'
+    })
+
+def api_response(body):
+    """Mock HTTP response carrying a JSON body"""
+    response = Mock(content=orjson.dumps(body))
+    response.raise_for_status = Mock()
+    return response
+
+def campaign_row(campaign_id):
+    """Stats row with a nested field and padding that is never extracted"""
+    return {
+        'campaign_id': campaign_id,
+        'campaign_name': f'Campaign {campaign_id}',
+        'spend': 12.5,
+        'impressions': 1000,
+        'budget_mode': {'mode': 'DAY', 'limits': [1, 2]},
+        'unused': 'x' * 1000
+    }
+
+def test_large_stats_response_returns_plain_values(connector):
+    """Test large stats responses come back as plain dicts and lists"""
+    rows = [campaign_row(f'c{i}') for i in range(100)]
+    response = api_response({'code': 0, 'message': 'OK', 'data': {'list': rows}})
+    assert len(response.content) > _SIMDJSON_MIN_BYTES
+    
+    with patch.object(connector.session, 'request', return_value=response):
+        stats = connector.get_campaigns_stats([row['campaign_id'] for row in rows])
+    
+    assert list(stats) == [row['campaign_id'] for row in rows]
+    assert type(stats['c7']) is dict
+    assert type(stats['c7']['budget_mode']) is dict
+    assert type(stats['c7']['budget_mode']['limits']) is list
+    assert stats['c7']['spend'] == 12.5
+    assert 'unused' not in stats['c7']
+    orjson.dumps(stats)
+
+def test_large_responses_outside_stats_are_dicts(connector):
+    """Test non-stats endpoints always get a plain dict, whatever the size"""
+    body = {'code': 0, 'data': {'advertiser_name': 'x' * (_SIMDJSON_MIN_BYTES + 1)}}
+    
+    with patch.object(connector.session, 'request', return_value=api_response(body)):
+        response = connector._make_request("advertiser/info/", params={})
+    
+    assert type(response) is dict
+    assert type(response['data']) is dict
+    
+    with patch.object(connector.session, 'request', return_value=api_response(body)):
+        assert connector.authenticate()
+
+def test_stats_error_code_raises(connector):
+    """Test an API error code is reported with its message"""
+    response = api_response({'code': 40001, 'message': 'Invalid advertiser'})
+    
+    with patch.object(connector.session, 'request', return_value=response):
+        with pytest.raises(Exception, match='Invalid advertiser'):
+            connector.get_campaign_stats('c1')
+
+def test_rate_limit_exhausted_is_logged_and_raised(connector, caplog):
+    """Test an exhausted rate limit raises the limiter error after logging it"""
+    connector.rate_limiter = Limiter(Rate(1, Duration.SECOND))
+    body = {'code': 0, 'data': {}}
+    
+    with patch.object(connector.session, 'request', return_value=api_response(body)) as request:
+        connector._make_request("advertiser/info/", params={})
+        with pytest.raises(BucketFullException):
+            connector._make_request("advertiser/info/", params={})
+    
+    assert request.call_count == 1
+    assert "API request rate limited" in caplog.text
+
+def test_rate_limited_update_returns_false(connector):
+    """Test write helpers report a rate-limited request as a failed update"""
+    connector.rate_limiter = Limiter(Rate(1, Duration.SECOND))
+    
+    with patch.object(connector._write_session, 'request',
+                      return_value=api_response({'code': 0})) as request:
+        assert connector.update_campaign('c1', {'status': 'ENABLE'})
+        assert not connector.update_campaign('c1', {'status': 'DISABLE'})
+    
+    assert request.call_count == 1
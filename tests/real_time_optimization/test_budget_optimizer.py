@@ -0,0 +1,173 @@
+"""Unit tests for BudgetOptimizer module"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from unittest.mock import Mock, patch
+from sklearn.preprocessing import StandardScaler
+from src.real_time_optimization.budget_optimizer import (
+    BudgetOptimizer,
+    CampaignMetrics,
+    CampaignMetricsStore,
+    _state_features,
+    _state_features_numpy,
+    _constrain_budgets,
+    _constrain_budgets_numpy
+)
+
+def make_metrics(campaign_id, spend=100.0, impressions=1000, clicks=20):
+    """Build campaign metrics with derived ROAS and CPA"""
+    return CampaignMetrics(
+        campaign_id=campaign_id,
+        spend=spend,
+        revenue=spend * 2,
+        impressions=impressions,
+        clicks=clicks,
+        conversions=5,
+        roas=2.0,
+        cpa=spend / 5,
+        timestamp=datetime(2024, 1, 1)
+    )
+
+@pytest.fixture
+def optimizer():
+    """BudgetOptimizer with a fixed two-campaign NumPy model"""
+    with patch.object(BudgetOptimizer, '_setup_models'):
+        optimizer = BudgetOptimizer({'min_campaign_budget': 10.0})
+    
+    rng = np.random.default_rng(0)
+    optimizer._layers = [
+        (rng.normal(size=(12, 4)).astype(np.float32), np.zeros(4, dtype=np.float32)),
+        (rng.normal(size=(4, 2)).astype(np.float32), np.zeros(2, dtype=np.float32))
+    ]
+    optimizer.scaler = StandardScaler()
+    optimizer._update_model = lambda *args: None
+    optimizer._fallback_allocation = lambda metrics, total_budget: 'fallback'
+    return optimizer
+
+def test_metrics_store_roundtrip():
+    """Test the columnar store returns the metrics it was given"""
+    metrics = {f"c{i}": make_metrics(f"c{i}", spend=float(i)) for i in range(100)}
+    store = CampaignMetricsStore.from_metrics(metrics)
+    
+    assert len(store) == 100
+    assert list(store) == list(metrics)
+    assert store['c42'] == metrics['c42']
+    np.testing.assert_array_equal(store.spend, np.arange(100, dtype=np.float64))
+
+def test_metrics_store_update_overwrites():
+    """Test updating an existing campaign overwrites its row"""
+    store = CampaignMetricsStore(capacity=1)
+    store.update('c1', make_metrics('c1', spend=1.0))
+    store.update('c2', make_metrics('c2', spend=2.0))
+    store.update('c1', make_metrics('c1', spend=3.0))
+    
+    assert list(store) == ['c1', 'c2']
+    assert store['c1'].spend == 3.0
+    assert 'c3' not in store
+
+def test_state_features_kernel_matches_numpy():
+    """Test the state kernel matches the NumPy reference, including zero impressions"""
+    store = CampaignMetricsStore.from_metrics({
+        'c1': make_metrics('c1', impressions=1000, clicks=20),
+        'c2': make_metrics('c2', impressions=0, clicks=0)
+    })
+    columns = (store.spend, store.revenue, store.roas, store.cpa,
+               store.conversions, store.clicks, store.impressions)
+    
+    expected = _state_features_numpy(*columns)
+    np.testing.assert_allclose(_state_features(*columns), expected)
+    assert expected[0, 5] == pytest.approx(0.02)
+    assert expected[1, 5] == 0.0
+
+def test_state_from_dict_matches_store(optimizer):
+    """Test dictionaries and stores produce the same state"""
+    metrics = {'a': make_metrics('a'), 'b': make_metrics('b', impressions=0, clicks=3)}
+    store = CampaignMetricsStore.from_metrics(metrics)
+    
+    np.testing.assert_array_equal(
+        optimizer._prepare_state(metrics),
+        optimizer._prepare_state(store)
+    )
+    assert store['a'] is metrics['a']
+
+def test_constrain_budgets_kernel_matches_numpy():
+    """Test the constraint kernel matches the NumPy reference"""
+    budgets = np.array([5.0, 50.0, 100.0])
+    
+    expected = _constrain_budgets_numpy(budgets.copy(), 10.0, 120.0)
+    np.testing.assert_allclose(_constrain_budgets(budgets.copy(), 10.0, 120.0), expected)
+    assert expected.sum() == pytest.approx(120.0)
+
+def test_batch_matches_single(optimizer):
+    """Test batched optimization gives the same allocations as one at a time"""
+    requests = [
+        ({'a': make_metrics('a'), 'b': make_metrics('b', spend=300.0)}, 1000.0),
+        ({'c': make_metrics('c', clicks=90), 'd': make_metrics('d')}, 500.0)
+    ]
+    
+    batched = optimizer.batch_optimize_budgets(requests)
+    single = [optimizer.optimize_budgets(metrics, budget) for metrics, budget in requests]
+    
+    for batch_result, single_result in zip(batched, single):
+        assert batch_result.keys() == single_result.keys()
+        for campaign_id in batch_result:
+            assert batch_result[campaign_id].optimized_budget == pytest.approx(
+                single_result[campaign_id].optimized_budget
+            )
+
+def test_batch_does_not_modify_requests(optimizer):
+    """Test the caller's request list is left untouched"""
+    metrics = {'a': make_metrics('a'), 'b': make_metrics('b')}
+    requests = [(metrics, 1000.0)]
+    
+    optimizer.batch_optimize_budgets(requests)
+    
+    assert requests[0][0] is metrics
+
+def test_batch_falls_back_per_request(optimizer):
+    """Test mismatched and invalid requests fall back without failing the batch"""
+    requests = [
+        ({'a': make_metrics('a'), 'b': make_metrics('b')}, 1000.0),
+        ({'a': make_metrics('a')}, 1000.0),  # State width differs from the model
+        ({'a': make_metrics('a'), 'b': make_metrics('b')}, 5.0)  # Budget below minimums
+    ]
+    
+    results = optimizer.batch_optimize_budgets(requests)
+    
+    assert set(results[0]) == {'a', 'b'}
+    assert sum(a.optimized_budget for a in results[0].values()) == pytest.approx(1000.0)
+    assert results[1] == 'fallback'
+    assert results[2] == 'fallback'
+    
+    # The single-request path falls back the same way
+    assert optimizer.optimize_budgets(*requests[1]) == 'fallback'
+
+def test_batch_model_failure_falls_back(optimizer):
+    """Test a model error falls back for every pending request"""
+    optimizer._get_model_action = lambda states: 1 / 0
+    requests = [({'a': make_metrics('a'), 'b': make_metrics('b')}, 1000.0)] * 2
+    
+    assert optimizer.batch_optimize_budgets(requests) == ['fallback', 'fallback']
+
+def test_update_performance_fits_and_persists_scaler(tmp_path):
+    """Test update_performance fits the scaler and a new optimizer warm-starts from it"""
+    config = {'min_campaign_budget': 10.0, 'model_config': {'state_dir': str(tmp_path)}}
+    metrics = {
+        'a': make_metrics('a', spend=100.0, clicks=20),
+        'b': make_metrics('b', spend=300.0, clicks=60),
+        'c': make_metrics('c', spend=500.0, clicks=10)
+    }
+    
+    with patch.object(BudgetOptimizer, '_build_rl_model', return_value=Mock(built=False)):
+        optimizer = BudgetOptimizer(config)
+        optimizer.update_performance(metrics)
+        restored = BudgetOptimizer(config)
+    
+    assert (tmp_path / 'budget_scaler.joblib').exists()
+    np.testing.assert_allclose(restored.scaler.mean_, optimizer.scaler.mean_)
+    
+    # Warm-started state is standardized per feature across campaigns
+    state = restored._prepare_state(metrics)
+    np.testing.assert_allclose(state.reshape(len(metrics), -1).mean(axis=0), 0.0, atol=1e-9)
+    np.testing.assert_array_equal(state, optimizer._prepare_state(metrics))
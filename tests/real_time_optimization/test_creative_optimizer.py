@@ -0,0 +1,174 @@
+"""Unit tests for CreativeOptimizer module"""
+
+import subprocess
+import sys
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from src.real_time_optimization.creative_optimizer import CreativeOptimizer, CreativeElement
+
+@pytest.fixture
+def creative_optimizer():
+    """CreativeOptimizer without model setup"""
+    with patch.object(CreativeOptimizer, '_setup_models'):
+        return CreativeOptimizer({'workers': 4})
+
+def test_batch_results_follow_input_order(creative_optimizer):
+    """Test batch results keep ads_data order when later ads finish first"""
+    ads_data = {f"ad{i}": ({}, {'delay': 0.05 * (4 - i)}) for i in range(4)}
+    
+    def optimize(ad_id, elements, performance, text_predictions=None):
+        time.sleep(performance['delay'])
+        return ad_id
+    
+    creative_optimizer.optimize_creative = optimize
+    results = creative_optimizer.batch_optimize_creatives(ads_data)
+    
+    assert list(results) == list(ads_data)
+    assert list(results.values()) == list(ads_data)
+
+def test_batch_skips_failed_ads(creative_optimizer):
+    """Test a failing ad is left out without affecting the others"""
+    def optimize(ad_id, elements, performance, text_predictions=None):
+        if ad_id == 'bad':
+            raise ValueError("broken creative")
+        return ad_id
+    
+    creative_optimizer.optimize_creative = optimize
+    results = creative_optimizer.batch_optimize_creatives({
+        'ad1': ({}, {}),
+        'bad': ({}, {}),
+        'ad2': ({}, {})
+    })
+    
+    assert list(results) == ['ad1', 'ad2']
+
+def test_text_analyzer_loaded_on_first_use():
+    """Test the text model is not built at construction and built only once"""
+    config = {'model_config': {'n_estimators': 5, 'text_model': 'distilbert-base-uncased'}}
+    with patch.object(CreativeOptimizer, '_build_text_analyzer',
+                      return_value=('tokenizer', 'model')) as build:
+        optimizer = CreativeOptimizer(config)
+        assert build.call_count == 0
+        
+        assert optimizer._get_text_analyzer() == ('tokenizer', 'model')
+        assert optimizer._get_text_analyzer() == ('tokenizer', 'model')
+        assert build.call_count == 1
+
+@pytest.fixture
+def text_optimizer():
+    """CreativeOptimizer whose text model flags any text containing 'bad'"""
+    config = {
+        'workers': 2,
+        'performance_thresholds': {'min_ctr': 0.01, 'min_engagement': 0.02, 'min_cvr': 0.01},
+        'model_config': {'n_estimators': 5}
+    }
+    with patch.object(CreativeOptimizer, '_setup_models'):
+        optimizer = CreativeOptimizer(config)
+    optimizer.performance_history = {}
+    optimizer.classified = []
+    
+    def classify(texts):
+        optimizer.classified.append(list(texts))
+        return [
+            {'label': 'NEGATIVE' if 'bad' in text else 'POSITIVE', 'score': 0.9}
+            for text in texts
+        ]
+    
+    optimizer._classify_texts = classify
+    return optimizer
+
+def make_element(element_id, element_type, content):
+    """Build a creative element without metrics or variations"""
+    return CreativeElement(
+        element_id=element_id,
+        element_type=element_type,
+        content=content,
+        performance_metrics={},
+        variations=[],
+        last_updated=datetime(2024, 1, 1)
+    )
+
+PERFORMING = {'ctr': 0.05, 'engagement_rate': 0.05, 'conversion_rate': 0.05}
+
+def test_batch_classifies_all_text_in_one_call(text_optimizer):
+    """Test text from every ad is classified together and flags its elements"""
+    ads_data = {
+        'ad1': ({
+            'headline': make_element('headline', 'text', 'bad copy'),
+            'body': make_element('body', 'text', 'great copy'),
+            'hero': make_element('hero', 'image', b'image')
+        }, PERFORMING),
+        'ad2': ({'headline': make_element('headline', 'text', 'fine copy')}, PERFORMING),
+        'ad3': (
+            {'headline': make_element('headline', 'text', 'any copy')},
+            dict(PERFORMING, engagement_rate=0.0)
+        )
+    }
+    
+    results = text_optimizer.batch_optimize_creatives(ads_data)
+    
+    # Low engagement already flags ad3's text, so it is not classified
+    assert text_optimizer.classified == [['bad copy', 'great copy', 'fine copy']]
+    assert list(results['ad1'].optimized_elements) == ['headline']
+    assert not results['ad2'].optimized_elements
+    assert list(results['ad3'].optimized_elements) == ['headline']
+
+def test_single_ad_classifies_its_own_text(text_optimizer):
+    """Test optimize_creative classifies text when no predictions are given"""
+    elements = {
+        'headline': make_element('headline', 'text', 'bad copy'),
+        'body': make_element('body', 'text', 'great copy')
+    }
+    
+    result = text_optimizer.optimize_creative('ad1', elements, PERFORMING)
+    
+    assert text_optimizer.classified == [['bad copy', 'great copy']]
+    assert list(result.optimized_elements) == ['headline']
+
+def test_module_import_does_not_load_torch():
+    """Test PyTorch and transformers load with the text analyzer, not the module"""
+    code = (
+        "import sys\n"
+        "import src.real_time_optimization.creative_optimizer\n"
+        "assert 'torch' not in sys.modules\n"
+        "assert 'transformers' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+def test_text_model_called_directly_in_batches():
+    """Test optimize_creative reaches the tokenizer and model in text_batch_size chunks"""
+    torch = pytest.importorskip('torch')
+    config = {
+        'text_batch_size': 2,
+        'performance_thresholds': {'min_ctr': 0.01, 'min_engagement': 0.02, 'min_cvr': 0.01},
+        'model_config': {'n_estimators': 5, 'text_model': 'sentiment-model'}
+    }
+    
+    def tokenizer(texts, **kwargs):
+        # One input row per text; 'bad' texts get the NEGATIVE logit
+        return {'input_ids': torch.tensor([[1.0 if 'bad' in text else 0.0] for text in texts])}
+    
+    class Model:
+        config = Mock(id2label={0: 'POSITIVE', 1: 'NEGATIVE'})
+        
+        def __init__(self):
+            self.batch_sizes = []
+        
+        def __call__(self, input_ids):
+            self.batch_sizes.append(len(input_ids))
+            logits = torch.cat([1.0 - input_ids, input_ids], dim=1) * 4
+            return Mock(logits=logits)
+    
+    model = Model()
+    with patch.object(CreativeOptimizer, '_build_text_analyzer', return_value=(tokenizer, model)):
+        optimizer = CreativeOptimizer(config)
+        elements = {
+            name: make_element(name, 'text', text)
+            for name, text in [('headline', 'good copy'), ('body', 'bad copy'), ('footer', 'fine copy')]
+        }
+        result = optimizer.optimize_creative('ad1', elements, PERFORMING)
+    
+    assert model.batch_sizes == [2, 1]
+    assert list(result.optimized_elements) == ['body']
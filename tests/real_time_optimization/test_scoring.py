@@ -0,0 +1,123 @@
+"""Unit tests for the ad scoring module"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from src.real_time_optimization.scoring import (
+    AdPerformanceMetrics,
+    AdScore,
+    AdScorer,
+    MetricsHistory
+)
+
+def make_metrics(ad_id='ad_1', impressions=1000, ctr=0.02, cvr=0.05,
+                 engagement_rate=0.03):
+    """Build ad metrics with the given rates"""
+    return AdPerformanceMetrics(
+        ad_id=ad_id,
+        platform='facebook',
+        impressions=impressions,
+        clicks=int(impressions * ctr),
+        conversions=int(impressions * ctr * cvr),
+        spend=50.0,
+        ctr=ctr,
+        cvr=cvr,
+        cpc=0.5,
+        roas=2.5,
+        engagement_rate=engagement_rate,
+        timestamp=datetime(2024, 1, 1)
+    )
+
+@pytest.fixture
+def scorer():
+    """AdScorer with a small forest fitted on synthetic features"""
+    scorer = AdScorer({
+        'scoring_weights': {'engagement': 0.3, 'conversion': 0.3, 'efficiency': 0.2, 'roi': 0.2},
+        'min_data_points': 2,
+        'max_history_size': 10,
+        'model_config': {'n_estimators': 5}
+    })
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0.0, 1.0, size=(50, 9)) * [5000, 100, 10, 100, 0.05, 0.1, 1, 5, 0.05]
+    scorer.model.fit(features, rng.uniform(0.0, 1.0, size=(50, 4)))
+    scorer._calculate_prediction_impact = lambda predicted_metrics: 0.5
+    return scorer
+
+def test_history_keeps_small_rates():
+    """Test rates far below 1% survive storage"""
+    history = MetricsHistory(4)
+    history.append(make_metrics(ctr=0.0015, cvr=0.0004, engagement_rate=0.0008))
+    
+    assert history.column('ctr')[0] == pytest.approx(0.0015, rel=1e-3)
+    assert history.column('cvr')[0] == pytest.approx(0.0004, rel=1e-3)
+    assert history.column('engagement_rate')[0] == pytest.approx(0.0008, rel=1e-3)
+
+def test_history_ring_buffer_order():
+    """Test the oldest entries are evicted and order stays chronological"""
+    history = MetricsHistory(3)
+    for i in range(5):
+        history.append(make_metrics(impressions=1000 + i), timestamp_ns=i)
+    
+    assert len(history) == 3
+    assert history.column('impressions').tolist() == [1002, 1003, 1004]
+    assert history.column('timestamp').tolist() == [2, 3, 4]
+
+def test_feature_matrix_buffer_matches_columns():
+    """Test the preallocated feature path matches the allocating one"""
+    history = MetricsHistory(3)
+    for i in range(4):
+        history.append(make_metrics(impressions=1000 + i, ctr=0.001 * (i + 1)))
+    
+    out = np.empty((3, 9), dtype=np.float32)
+    np.testing.assert_allclose(
+        history.feature_matrix(out=out),
+        history.feature_matrix(),
+        rtol=1e-6
+    )
+
+def test_batch_predictions_match_single_path(scorer):
+    """Test batch and single scoring predict the same metrics for an ad"""
+    ads = [make_metrics(f'ad_{i}', impressions=1000 + 137 * i, ctr=0.0123 + 0.001 * i) for i in range(3)]
+    scorer.batch_score_ads(ads)
+    scores = scorer.batch_score_ads(ads)
+    
+    scorer.clear_prediction_cache()
+    for metrics in ads:
+        single = scorer._predict_future_metrics(metrics.ad_id, metrics, None)
+        assert single == scores[metrics.ad_id].predicted_metrics
+
+def test_batch_predicts_cache_misses_once(scorer):
+    """Test one model call covers the batch and cached rows skip the model"""
+    ads = [make_metrics(f'ad_{i}', impressions=1000 + i) for i in range(4)]
+    scorer.batch_score_ads(ads)
+    
+    with patch.object(scorer, '_predict_rows', wraps=scorer._predict_rows) as predict:
+        scores = scorer.batch_score_ads(ads)
+        assert predict.call_count == 1
+        
+        for metrics in ads:
+            scorer._predict_future_metrics(metrics.ad_id, metrics, None)
+        assert predict.call_count == 1
+    
+    assert set(scores) == {m.ad_id for m in ads}
+
+def test_score_timestamp_is_wall_clock(scorer):
+    """Test scores carry a settable wall-clock timestamp"""
+    timestamp = datetime(2024, 1, 1, 12, 0)
+    score = AdScore(
+        ad_id='ad_1',
+        overall_score=0.5,
+        component_scores={},
+        predicted_metrics={},
+        confidence=0.3,
+        recommendations=[],
+        timestamp=timestamp
+    )
+    assert score.timestamp == timestamp
+    
+    before = datetime.now()
+    scores = scorer.batch_score_ads([make_metrics('ad_1'), make_metrics('ad_2')])
+    scores = scorer.batch_score_ads([make_metrics('ad_1'), make_metrics('ad_2')])
+    assert scores['ad_1'].timestamp == scores['ad_2'].timestamp
+    assert before - timedelta(seconds=1) <= scores['ad_1'].timestamp <= datetime.now()